@@ -1,7 +1,10 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request, HTTPException, File, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Dict, List, Optional
 from services.chat_service import process_chat_command
+from services.ai.azure_ai_client import IMAGE_CACHE_DIR
 import httpx
+import json
 import os
 import logging
 
@@ -73,6 +76,32 @@ async def whisper_transcription(request: Request):
     endpoint = f"{RUNPOD_WHISPER_ENDPOINT}/transcribe"
     return await proxy_to_runpod(endpoint, request)
 
+@router.post("/chat/stream")
+async def chat_stream(payload: Dict):
+    """Stream an LLM reply as server-sent events, one token per event"""
+    message = payload.get("message")
+    if not message:
+        raise HTTPException(status_code=400, detail="message is required")
+
+    async def events():
+        try:
+            async for token in ai_manager.chat_stream(message, payload.get("context")):
+                yield f"data: {json.dumps(token)}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/images/{image_name}")
+async def get_cached_image(image_name: str):
+    """Serve a generated image from the Azure AI image cache"""
+    path = os.path.join(IMAGE_CACHE_DIR, os.path.basename(image_name))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(path, media_type="image/png")
+
 @router.post("/start-simulation")
 async def start_trading_simulation(days: int = 30):
     """Start AI-powered trading simulation"""
@@ -155,8 +155,8 @@ async def narrate_trade(trade_data: Dict):
 async def speech_to_text(file: UploadFile = File(...)):
     """Convert speech to text"""
     try:
-        audio_data = await file.read()
-        result = await ai_manager.speech_to_text(audio_data, file.filename)
+        # Hand over the spooled upload itself; it is read on the decode thread
+        result = await ai_manager.speech_to_text(file.file, file.filename)
         return {"transcription": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -166,8 +166,7 @@ async def speech_to_text(file: UploadFile = File(...)):
 async def detect_objects(file: UploadFile = File(...)):
     """Detect objects in image"""
     try:
-        image_data = await file.read()
-        result = await ai_manager.detect_objects(image_data, file.filename)
+        result = await ai_manager.detect_objects(file.file, file.filename)
         return {"detection": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -244,5 +243,6 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
-        reload=True
+        reload=True,
+        loop="auto"  # uvloop when installed
     )
\ No newline at end of file
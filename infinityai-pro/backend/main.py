@@ -16,6 +16,7 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown"""
     # Startup
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     try:
         logger.info("Initializing AI Manager...")
         await ai_manager.initialize()
@@ -72,4 +73,5 @@ if __name__ == "__main__":
 	import uvicorn
 	import os
 	port = int(os.getenv("PORT", 8000))
-	uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+	# "auto" picks uvloop when installed, falling back to asyncio elsewhere
+	uvicorn.run(app, host="0.0.0.0", port=port, loop="auto")
\ No newline at end of file
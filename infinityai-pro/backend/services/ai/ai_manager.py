@@ -7,7 +7,7 @@ Coordinates all AI services: LLM, STT, Vision, Embeddings, Vector Search
 import os
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+from typing import IO, AsyncIterator, Dict, List, Optional, Any, Union
 from pathlib import Path
 import json
 from datetime import datetime
@@ -38,7 +38,9 @@ class AIManager:
             },
             "whisper": {
                 "model": os.getenv("WHISPER_MODEL", "tiny"),  # Changed from "base" to "tiny" for smaller size
-                "language": os.getenv("WHISPER_LANGUAGE", "en")
+                "language": os.getenv("WHISPER_LANGUAGE", "en"),
+                "device": os.getenv("WHISPER_DEVICE", "auto"),  # faster-whisper: auto, cpu or cuda
+                "compute_type": os.getenv("WHISPER_COMPUTE_TYPE", "")  # default: int8 on CPU, float16 on GPU
             },
             "diffusers": {
                 "model": os.getenv("DIFFUSERS_MODEL", "stabilityai/sd-turbo"),  # Smaller/faster model
@@ -50,12 +52,14 @@ class AIManager:
             },
             "sbert": {
                 "model": os.getenv("SBERT_MODEL", "all-MiniLM-L6-v2"),  # Smallest SBERT model
-                "use_gpu": False  # Force CPU
+                "use_gpu": os.getenv("SBERT_USE_GPU", "true").lower() == "true",  # Only used if CUDA is present
+                "backend": os.getenv("SBERT_BACKEND", "torch")  # "onnx" for INT8 ONNX Runtime on CPU
             },
             "vector_db": {
                 "type": os.getenv("VECTOR_DB", "chromadb"),
                 "url": os.getenv("VECTOR_DB_URL", "http://localhost:8000"),
-                "collection": "infinity_ai_docs"
+                "collection": "infinity_ai_docs",
+                "quantization": os.getenv("VECTOR_DB_QUANTIZATION", "int8")  # int8 or none
             },
             "runpod": {
                 "sd_endpoint": os.getenv("RUNPOD_SD_ENDPOINT", ""),
@@ -146,6 +150,24 @@ class AIManager:
         except Exception as e:
             logger.warning(f"AI Trading Simulator failed: {e}")
 
+    async def _start_service(self, name: str, label: str, factory):
+        """Construct, register and initialize one service, logging instead of raising"""
+        try:
+            self.services[name] = factory()
+            await self.services[name].initialize()
+            logger.info(f"✅ {label} initialized")
+        except Exception as e:
+            logger.warning(f"{label} failed: {e}")
+
+    async def _start_azure_ai(self):
+        """Create the shared Azure AI client"""
+        try:
+            from .azure_ai_client import get_azure_ai_client
+            self.services['azure_ai'] = await get_azure_ai_client()
+            logger.info("✅ Azure AI client initialized")
+        except Exception as e:
+            logger.warning(f"Azure AI client failed: {e}")
+
     async def initialize(self):
         """Initialize all AI services"""
         if self.initialized:
@@ -169,66 +191,70 @@ class AIManager:
                 self.initialized = True
                 return
 
-            # Initialize LLM (Ollama - Hetzner) - lightweight
-            try:
-                self.services['llm'] = LLMService(self.config['ollama'])
-                await self.services['llm'].initialize()
-                logger.info("✅ LLM service initialized")
-            except Exception as e:
-                logger.warning(f"LLM service failed: {e}")
+            from .llm_service import LLMService
+            from .stt_service import STTService
+            from .vision_service import VisionService
+            from .embedding_service import EmbeddingService
+            from .huggingface_client import hf_client
+
+            # Heavy services are independent of each other, so their model loads
+            # and connection setup overlap instead of running back to back
+            startups = [
+                self._start_service('llm', "LLM service", lambda: LLMService(self.config['ollama']))
+            ]
 
             # Initialize STT (RunPod GPU or local Whisper) - check disk space
             stt_min_free = 0.3  # Whisper tiny needs ~300MB
             if free_gb > stt_min_free:
-                try:
-                    self.services['stt'] = STTService(self.config['whisper'])
-                    await self.services['stt'].initialize()
-                    logger.info("✅ STT service initialized")
-                except Exception as e:
-                    logger.warning(f"STT service failed: {e}")
+                startups.append(self._start_service(
+                    'stt', "STT service", lambda: STTService(self.config['whisper'])
+                ))
             else:
                 logger.warning(f"Skipping STT service - insufficient disk space ({free_gb:.1f}GB free, need {stt_min_free}GB)")
 
             # Initialize Vision (RunPod GPU or local YOLO) - check disk space
             vision_min_free = self.config['disk_optimization']['vision_min_free_gb']
             if free_gb > vision_min_free:
-                try:
-                    self.services['vision'] = VisionService(self.config['yolo'], self.config['diffusers'])
-                    await self.services['vision'].initialize()
-                    logger.info("✅ Vision service initialized")
-                except Exception as e:
-                    logger.warning(f"Vision service failed: {e}")
+                startups.append(self._start_service(
+                    'vision', "Vision service",
+                    lambda: VisionService(self.config['yolo'], self.config['diffusers'])
+                ))
             else:
                 logger.warning(f"Skipping Vision service - insufficient disk space ({free_gb:.1f}GB free, need {vision_min_free}GB)")
 
             # Initialize Embeddings (SBERT + Vector DB) - check disk space
             embeddings_min_free = self.config['disk_optimization']['embeddings_min_free_gb']
             if free_gb > embeddings_min_free:
-                try:
-                    self.services['embeddings'] = EmbeddingService(self.config['sbert'], self.config['vector_db'])
-                    await self.services['embeddings'].initialize()
-                    logger.info("✅ Embeddings service initialized")
-                except Exception as e:
-                    logger.warning(f"Embeddings service failed: {e}")
+                startups.append(self._start_service(
+                    'embeddings', "Embeddings service",
+                    lambda: EmbeddingService(self.config['sbert'], self.config['vector_db'])
+                ))
             else:
                 logger.warning(f"Skipping Embeddings service - insufficient disk space ({free_gb:.1f}GB free, need {embeddings_min_free}GB)")
 
             # Initialize Hugging Face fallback - always available
-            self.services['huggingface'] = hf_client
-            await self.services['huggingface'].initialize()
-            logger.info("✅ HuggingFace fallback initialized")
+            startups.append(self._start_service('huggingface', "HuggingFace fallback", lambda: hf_client))
 
             # Initialize Azure AI (hybrid cloud fallback)
             if self.config['azure_ai']['enabled']:
-                try:
-                    from .azure_ai_client import get_azure_ai_client
-                    self.services['azure_ai'] = await get_azure_ai_client()
-                    logger.info("✅ Azure AI client initialized")
-                except Exception as e:
-                    logger.warning(f"Azure AI client failed: {e}")
+                startups.append(self._start_azure_ai())
             else:
                 logger.info("ℹ️  Azure AI not configured - skipping")
 
+            await asyncio.gather(*startups)
+
+            # Let the LLM and the HuggingFace fallback answer paraphrased prompts
+            # from cache, reusing the SBERT model; each gets its own cache
+            embeddings = self.services.get('embeddings')
+            if embeddings is not None and embeddings.sbert_model is not None:
+                from .response_cache import SemanticResponseCache
+                from .embedding_service import EMBEDDING_DIM
+                for name in ('llm', 'huggingface'):
+                    service = self.services.get(name)
+                    if service is not None:
+                        service.semantic_cache = SemanticResponseCache(embeddings.encode, EMBEDDING_DIM)
+                        logger.info(f"✅ {name} semantic cache enabled")
+
             # Initialize remaining services (market data, technical analysis, etc.)
             await self._initialize_remaining_services()
             
@@ -275,6 +301,19 @@ class AIManager:
 
         raise RuntimeError("No LLM service available")
 
+    async def chat_stream(self, message: str, context: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Stream a chat response token by token, falling back to one full reply"""
+        if 'llm' in self.services:
+            try:
+                async for token in self.services['llm'].chat_stream(message, context):
+                    yield token
+                return
+            except Exception as e:
+                logger.warning(f"Local LLM stream failed, falling back: {e}")
+
+        result = await self.chat(message, context)
+        yield result.get("response", "")
+
     async def generate_strategy(self, signal_data: Dict, market_context: Dict = None) -> Dict:
         """Generate trading strategy using LLM"""
         if 'llm' not in self.services:
@@ -283,7 +322,7 @@ class AIManager:
         return await self.services['llm'].generate_trading_strategy(signal_data, market_context)
 
     # STT Methods
-    async def speech_to_text(self, audio_data: bytes, filename: str = None) -> Dict:
+    async def speech_to_text(self, audio_data: Union[bytes, IO[bytes]], filename: str = None) -> Dict:
         """Convert speech to text using local or Azure AI"""
         # Try local STT service first
         if 'stt' in self.services:
@@ -294,6 +333,9 @@ class AIManager:
 
         # Fallback to Azure AI Whisper
         if 'azure_ai' in self.services:
+            if hasattr(audio_data, 'seek'):
+                # The local attempt may have consumed the upload
+                audio_data.seek(0)
             try:
                 async with self.services['azure_ai'] as client:
                     return await client.speech_to_text(audio_data)
@@ -303,7 +345,7 @@ class AIManager:
         raise RuntimeError("No speech-to-text service available")
 
     # Vision Methods
-    async def detect_objects(self, image_data: bytes, filename: str = None) -> Dict:
+    async def detect_objects(self, image_data: Union[bytes, IO[bytes]], filename: str = None) -> Dict:
         """Detect objects in image using YOLO"""
         if 'vision' not in self.services:
             raise RuntimeError("Vision service not initialized")
@@ -327,7 +369,8 @@ class AIManager:
                         prompt,
                         size=kwargs.get('size', '1024x1024'),
                         quality=kwargs.get('quality', 'standard'),
-                        style=kwargs.get('style', 'vivid')
+                        style=kwargs.get('style', 'vivid'),
+                        bypass_cache=kwargs.get('bypass_cache', False)
                     )
             except Exception as e:
                 logger.error(f"Azure AI image generation failed: {e}")
@@ -550,19 +593,19 @@ class AIManager:
             "timestamp": datetime.now().isoformat()
         }
 
-        for service_name, service in self.services.items():
-            try:
-                if service_name == 'azure_ai':
-                    # Special handling for Azure AI client
-                    health = await service.health_check()
-                else:
-                    health = await service.health_check()
-                health_status["services"][service_name] = health
-                if health.get("status") != "healthy":
-                    health_status["overall"] = "degraded"
-            except Exception as e:
-                health_status["services"][service_name] = {"status": "error", "error": str(e)}
+        names = list(self.services)
+        results = await asyncio.gather(
+            *(self.services[name].health_check() for name in names), return_exceptions=True
+        )
+
+        for service_name, health in zip(names, results):
+            if isinstance(health, Exception):
+                health_status["services"][service_name] = {"status": "error", "error": str(health)}
                 health_status["overall"] = "unhealthy"
+                continue
+            health_status["services"][service_name] = health
+            if health.get("status") != "healthy" and health_status["overall"] != "unhealthy":
+                health_status["overall"] = "degraded"
 
         return health_status
 
@@ -1,15 +1,43 @@
 # Azure AI Foundry Integration for InfinityAI.Pro
 
 import os
+import time
+import random
 import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
-import json
+from typing import IO, AsyncIterator, Callable, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime
 import aiohttp
+import orjson
+
+from .response_cache import ExactResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Exact-match response cache settings
+EXACT_CACHE_TTL_SECONDS = 3600
+EXACT_CACHE_DIR = "./cache/azure"
+EXACT_CACHE_MAX_ENTRIES = int(os.getenv("AZURE_CACHE_MAX_ENTRIES", "1000"))
+
+# Generated image cache; Azure's signed image URLs are valid for about a day
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("AZURE_IMAGE_CACHE_TTL", "86400"))
+IMAGE_CACHE_DIR = "./cache/images"
+IMAGE_CACHE_URL_PREFIX = "/ai/images"
+
+# Request headers for pre-encoded JSON bodies
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Read size for streamed response bodies
+RESPONSE_CHUNK_SIZE = 65536
+
+# Maximum in-flight chat requests issued by chat_completion_batch
+BATCH_MAX_CONCURRENCY = 16
+
+# HTTP 429 retry policy
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BASE_DELAY = 0.5
+
 class AzureAIClient:
     """
     Azure AI Foundry client for managed AI services
@@ -21,37 +49,125 @@ class AzureAIClient:
         self.key = key
         self.project = project
         self.session = None
+        self._owns_context_session = False
+        # Caps in-flight requests across all callers so bursts queue here
+        # instead of turning into 429s from Azure
+        self._semaphore = asyncio.Semaphore(int(os.getenv("AZURE_MAX_CONCURRENCY", "32")))
+        self._exact_cache = ExactResponseCache(EXACT_CACHE_TTL_SECONDS, EXACT_CACHE_DIR, EXACT_CACHE_MAX_ENTRIES)
+        # key -> {image_url, revised_prompt, local_path, created_at}
+        self._image_cache: Dict[str, Dict] = {}
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create the long-lived pooled session shared by all requests"""
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True
+        )
+        # Auth is added per request (see _auth_headers) so downloads from
+        # image storage never carry the API key; Content-Type is left to
+        # aiohttp so JSON and multipart bodies both work
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=60, connect=5)
+        )
+
+    def _auth_headers(self, headers: Optional[Dict] = None) -> Dict:
+        """Merge the API key into per-request headers"""
+        return {'api-key': self.key, **(headers or {})}
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            headers={
-                'api-key': self.key,
-                'Content-Type': 'application/json'
-            }
-        )
+        # The shared session outlives the context; only a session opened
+        # here (standalone use) is closed on exit
+        self._owns_context_session = self.session is None
+        if self._owns_context_session:
+            self.session = self._create_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_context_session:
+            await self.close()
+
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self.session and not self.session.closed:
             await self.session.close()
+        self.session = None
 
-    async def _make_request(self, url: str, payload: Dict) -> Dict:
-        """Make authenticated request to Azure AI"""
+    @staticmethod
+    def _is_cacheable(payload: Dict, response: Dict) -> bool:
+        """Streaming, tool-calling and error responses are never cached"""
+        if payload.get("stream") or payload.get("tools") or payload.get("functions"):
+            return False
+        if "error" in response:
+            return False
+        for choice in response.get("choices", []):
+            message = choice.get("message") or {}
+            if message.get("tool_calls") or message.get("function_call"):
+                return False
+        return True
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> Dict:
+        """Decode a JSON body read incrementally in fixed-size chunks"""
+        buf = bytearray()
+        async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+            buf += chunk
+        return orjson.loads(buf)
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+        """Exponential backoff with jitter, never shorter than Retry-After"""
+        delay = RATE_LIMIT_BASE_DELAY * (2 ** attempt)
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return delay + random.uniform(0, RATE_LIMIT_BASE_DELAY)
+
+    async def _post(self, url: str, build_body: Callable[[], Dict]) -> Dict:
+        """POST under the concurrency cap, retrying rate-limited requests
+
+        build_body returns fresh session.post() keyword arguments for each
+        attempt, since multipart bodies cannot be sent twice.
+        """
         if not self.session:
-            async with aiohttp.ClientSession(
-                headers={
-                    'api-key': self.key,
-                    'Content-Type': 'application/json'
-                }
-            ) as session:
-                async with session.post(url, json=payload) as response:
-                    return await response.json()
-        else:
-            async with self.session.post(url, json=payload) as response:
-                return await response.json()
+            raise RuntimeError("Azure AI client session not initialized")
+
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            body = build_body()
+            body["headers"] = self._auth_headers(body.get("headers"))
+            async with self._semaphore:
+                async with self.session.post(url, **body) as response:
+                    if response.status != 429 or attempt == RATE_LIMIT_MAX_RETRIES:
+                        return await self._read_json(response)
+                    retry_after = response.headers.get('Retry-After')
+
+            # Back off outside the semaphore so other requests can proceed
+            delay = self._retry_delay(attempt, retry_after)
+            logger.warning(f"Azure AI rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    async def _make_request(self, url: str, payload: Dict, use_cache: bool = True) -> Dict:
+        """Make authenticated request to Azure AI"""
+        key = self._exact_cache.key(url, payload)
+        if use_cache:
+            cached = await self._exact_cache.get(key)
+            if cached is not None:
+                return {**cached, "cache": "HIT"}
+
+        body = orjson.dumps(payload)
+        result = await self._post(url, lambda: {"data": body, "headers": JSON_HEADERS})
+
+        if use_cache and self._is_cacheable(payload, result):
+            await self._exact_cache.put(key, result)
+        return {**result, "cache": "MISS"}
 
     async def chat_completion(self, message: str, model: str = "gpt-4",
-                            temperature: float = 0.7, max_tokens: int = 1000) -> Dict:
+                            temperature: float = 0.7, max_tokens: int = 1000,
+                            use_cache: bool = True) -> Dict:
         """
         Generate chat completion using Azure OpenAI GPT-4
         """
@@ -72,7 +188,7 @@ class AzureAIClient:
                 "presence_penalty": 0
             }
 
-            response = await self._make_request(url, payload)
+            response = await self._make_request(url, payload, use_cache=use_cache)
 
             if 'choices' in response and len(response['choices']) > 0:
                 return {
@@ -80,6 +196,7 @@ class AzureAIClient:
                     "response": response['choices'][0]['message']['content'],
                     "usage": response.get('usage', {}),
                     "model": model,
+                    "cache": response.get('cache'),
                     "timestamp": datetime.now().isoformat()
                 }
             else:
@@ -96,12 +213,172 @@ class AzureAIClient:
                 "error": str(e)
             }
 
+    async def chat_completion_stream(self, message: str, model: str = "gpt-4",
+                                   temperature: float = 0.7, max_tokens: int = 1000) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as SSE events arrive
+        """
+        if not self.session:
+            raise RuntimeError("Azure AI client session not initialized")
+
+        url = f"{self.endpoint}/openai/deployments/{model}/chat/completions?api-version=2023-12-01-preview"
+
+        payload = {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": message
+                }
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": 0.95,
+            "frequency_penalty": 0,
+            "presence_penalty": 0,
+            "stream": True
+        }
+
+        body = orjson.dumps(payload)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            async with self._semaphore:
+                async with self.session.post(url, data=body,
+                                             headers=self._auth_headers(JSON_HEADERS)) as response:
+                    if response.status == 429 and attempt < RATE_LIMIT_MAX_RETRIES:
+                        retry_after = response.headers.get('Retry-After')
+                    elif response.status != 200:
+                        # Error bodies are plain JSON, not SSE; surface them instead of parsing
+                        try:
+                            error = (await self._read_json(response)).get('error', {})
+                        except (ValueError, AttributeError):
+                            error = {}
+                        message = error.get('message') if isinstance(error, dict) else error
+                        raise RuntimeError(f"Azure AI stream failed with HTTP {response.status}: {message}")
+                    else:
+                        # SSE: one "data: {...}" line per event, terminated by "data: [DONE]"
+                        async for line in response.content:
+                            line = line.strip()
+                            if not line.startswith(b"data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == b"[DONE]":
+                                break
+                            event = orjson.loads(data)
+                            for choice in event.get('choices', []):
+                                delta = (choice.get('delta') or {}).get('content')
+                                if delta:
+                                    yield delta
+                        return
+
+            # Back off outside the semaphore so other requests can proceed
+            delay = self._retry_delay(attempt, retry_after)
+            logger.warning(f"Azure AI rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    async def chat_completion_batch(self, messages: List[str], model: str = "gpt-4",
+                                  temperature: float = 0.7, max_tokens: int = 1000,
+                                  use_completions: bool = False) -> List[Dict]:
+        """
+        Generate completions for several prompts at once
+
+        Legacy /completions deployments accept a list of prompts in a single
+        request; chat deployments do not, so those prompts are fanned out
+        concurrently over the shared session.  Results keep input order.
+        """
+        if not messages:
+            return []
+
+        if use_completions:
+            try:
+                url = f"{self.endpoint}/openai/deployments/{model}/completions?api-version=2023-12-01-preview"
+
+                payload = {
+                    "prompt": messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "top_p": 0.95
+                }
+
+                response = await self._make_request(url, payload)
+                timestamp = datetime.now().isoformat()
+
+                results: List[Dict] = [{
+                    "success": False,
+                    "error": "No response generated",
+                    "details": response
+                } for _ in messages]
+                # Choices may arrive out of order; demultiplex by index
+                for choice in response.get('choices', []):
+                    index = choice.get('index', 0)
+                    if 0 <= index < len(results):
+                        results[index] = {
+                            "success": True,
+                            "response": choice.get('text', ''),
+                            "usage": response.get('usage', {}),
+                            "model": model,
+                            "cache": response.get('cache'),
+                            "timestamp": timestamp
+                        }
+                return results
+
+            except Exception as e:
+                logger.error(f"Azure AI batch completion error: {e}")
+                return [{"success": False, "error": str(e)} for _ in messages]
+
+        # Chat deployments take one conversation per request; bound the fan-out
+        # so a large batch does not trip the per-minute request limit
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def _complete(message: str) -> Dict:
+            async with semaphore:
+                return await self.chat_completion(message, model, temperature, max_tokens)
+
+        return list(await asyncio.gather(*[_complete(m) for m in messages]))
+
+    async def _download_image(self, image_url: str, key: str) -> Optional[str]:
+        """Save a generated image locally so it outlives Azure's signed URL"""
+        try:
+            async with self.session.get(image_url) as response:
+                response.raise_for_status()
+                content = await response.read()
+
+            path = os.path.join(IMAGE_CACHE_DIR, f"{key}.png")
+
+            def _write():
+                os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(content)
+
+            await asyncio.to_thread(_write)
+            return path
+        except Exception as e:
+            logger.warning(f"Failed to cache generated image: {e}")
+            return None
+
     async def generate_image(self, prompt: str, size: str = "1024x1024",
-                           quality: str = "standard", style: str = "vivid") -> Dict:
+                           quality: str = "standard", style: str = "vivid",
+                           bypass_cache: bool = False) -> Dict:
         """
         Generate image using Azure DALL-E 3
+
+        Results are cached per (prompt, size, quality, style) for
+        IMAGE_CACHE_TTL_SECONDS and served from a local copy when available.
         """
         try:
+            key = hashlib.sha256(f"{prompt}|{size}|{quality}|{style}".encode()).hexdigest()
+
+            if not bypass_cache:
+                cached = self._image_cache.get(key)
+                if cached and time.time() - cached["created_at"] < IMAGE_CACHE_TTL_SECONDS:
+                    local_available = cached["local_path"] and os.path.exists(cached["local_path"])
+                    return {
+                        "success": True,
+                        "image_url": f"{IMAGE_CACHE_URL_PREFIX}/{key}.png" if local_available else cached["image_url"],
+                        "revised_prompt": cached["revised_prompt"],
+                        "usage": {},
+                        "cache": "HIT",
+                        "timestamp": datetime.now().isoformat()
+                    }
+
             url = f"{self.endpoint}/openai/deployments/dall-e-3/images/generations?api-version=2023-12-01-preview"
 
             payload = {
@@ -112,14 +389,28 @@ class AzureAIClient:
                 "n": 1
             }
 
-            response = await self._make_request(url, payload)
+            # Signed image URLs expire, so images use their own cache below
+            response = await self._make_request(url, payload, use_cache=False)
 
             if 'data' in response and len(response['data']) > 0:
+                image_url = response['data'][0]['url']
+                revised_prompt = response['data'][0].get('revised_prompt', prompt)
+                local_path = await self._download_image(image_url, key)
+
+                self._image_cache[key] = {
+                    "image_url": image_url,
+                    "revised_prompt": revised_prompt,
+                    "local_path": local_path,
+                    "created_at": time.time()
+                }
+
                 return {
                     "success": True,
-                    "image_url": response['data'][0]['url'],
-                    "revised_prompt": response['data'][0].get('revised_prompt', prompt),
+                    "image_url": f"{IMAGE_CACHE_URL_PREFIX}/{key}.png" if local_path else image_url,
+                    "source_url": image_url,
+                    "revised_prompt": revised_prompt,
                     "usage": response.get('usage', {}),
+                    "cache": "MISS",
                     "timestamp": datetime.now().isoformat()
                 }
             else:
@@ -136,28 +427,30 @@ class AzureAIClient:
                 "error": str(e)
             }
 
-    async def speech_to_text(self, audio_data: bytes, language: str = "en") -> Dict:
+    async def speech_to_text(self, audio_data: Union[bytes, IO[bytes]], language: str = "en") -> Dict:
         """
         Convert speech to text using Azure Whisper
         """
         try:
             url = f"{self.endpoint}/openai/deployments/whisper/audio/transcriptions?api-version=2023-12-01-preview"
 
+            # A retried attempt must resend the whole upload: rewind seekable files,
+            # and read one-shot streams into memory once up front
+            seekable = hasattr(audio_data, 'seek') and (not hasattr(audio_data, 'seekable') or audio_data.seekable())
+            if hasattr(audio_data, 'read') and not seekable:
+                audio_data = audio_data.read()
+
             # For binary data, we need to use multipart/form-data
-            data = aiohttp.FormData()
-            data.add_field('file', audio_data, filename='audio.wav')
-            data.add_field('model', 'whisper-1')
-            data.add_field('language', language)
-
-            if not self.session:
-                async with aiohttp.ClientSession(
-                    headers={'api-key': self.key}
-                ) as session:
-                    async with session.post(url, data=data) as response:
-                        result = await response.json()
-            else:
-                async with self.session.post(url, data=data) as response:
-                    result = await response.json()
+            def build_body() -> Dict:
+                if seekable:
+                    audio_data.seek(0)
+                data = aiohttp.FormData()
+                data.add_field('file', audio_data, filename='audio.wav')
+                data.add_field('model', 'whisper-1')
+                data.add_field('language', language)
+                return {"data": data}
+
+            result = await self._post(url, build_body)
 
             if 'text' in result:
                 return {
@@ -200,6 +493,7 @@ class AzureAIClient:
                     "embedding": response['data'][0]['embedding'],
                     "usage": response.get('usage', {}),
                     "model": model,
+                    "cache": response.get('cache'),
                     "timestamp": datetime.now().isoformat()
                 }
             else:
@@ -219,10 +513,12 @@ class AzureAIClient:
     async def health_check(self) -> Dict:
         """Check Azure AI service health"""
         try:
-            # Simple chat completion as health check
+            # Simple chat completion as health check; a cached reply would
+            # report healthy without reaching Azure
             test_response = await self.chat_completion(
                 "Hello, this is a health check. Respond with 'OK' if you can read this.",
-                max_tokens=10
+                max_tokens=10,
+                use_cache=False
             )
 
             return {
@@ -243,7 +539,11 @@ class AzureAIClient:
 azure_ai_client = None
 
 async def get_azure_ai_client() -> AzureAIClient:
-    """Get or create Azure AI client instance"""
+    """Get or create Azure AI client instance
+
+    The client owns a single pooled session for the life of the process;
+    it is closed once via AIManager.close() on application shutdown.
+    """
     global azure_ai_client
 
     if azure_ai_client is None:
@@ -255,5 +555,6 @@ async def get_azure_ai_client() -> AzureAIClient:
             raise ValueError("Azure AI credentials not configured. Set AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_KEY")
 
         azure_ai_client = AzureAIClient(endpoint, key, project)
+        azure_ai_client.session = azure_ai_client._create_session()
 
     return azure_ai_client
\ No newline at end of file
@@ -5,12 +5,115 @@ SBERT embeddings with vector database for semantic search
 """
 
 import os
+import atexit
+import base64
+import pickle
+import asyncio
+import functools
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Union
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Texts per SBERT forward pass (CPU / GPU)
+ENCODE_BATCH_SIZE = 64
+GPU_ENCODE_BATCH_SIZE = 128
+
+# Micro-batcher limits for coalescing concurrent single-text encodes
+MICRO_BATCH_MAX_SIZE = 64
+MICRO_BATCH_MAX_WAIT = 0.005  # seconds
+
+# all-MiniLM-L6-v2 output dimension
+EMBEDDING_DIM = 384
+
+# FAISS HNSW graph parameters
+FAISS_HNSW_M = 32
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = 64
+
+# Vectors buffered before a single FAISS add()
+FAISS_ADD_BATCH_SIZE = 256
+
+# Inserts between FAISS checkpoints to disk
+FAISS_SAVE_INTERVAL = 256
+
+# Initial row capacity of the in-memory fallback matrix
+MEMORY_INITIAL_CAPACITY = 1024
+
+class OnnxSentenceEncoder:
+    """SBERT on ONNX Runtime with dynamic INT8 weights for CPU-only hosts
+
+    Exposes the subset of SentenceTransformer.encode() used by
+    EmbeddingService: tokenize, run the ORT session, mean-pool over the
+    attention mask and optionally L2-normalize.
+    """
+
+    def __init__(self, model_name: str, model_dir: str):
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import QuantizationConfig
+        from onnxruntime.quantization import QuantFormat, QuantizationMode, QuantType
+        from transformers import AutoTokenizer
+
+        model_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+
+        # Export and quantize once; later starts load the cached INT8 graph
+        if not os.path.exists(quantized_path):
+            logger.info(f"Exporting {model_id} to ONNX with INT8 quantization")
+            fp32_model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+            quantizer = ORTQuantizer.from_pretrained(fp32_model)
+            quantizer.quantize(
+                save_dir=model_dir,
+                quantization_config=QuantizationConfig(
+                    is_static=False,
+                    format=QuantFormat.QOperator,
+                    mode=QuantizationMode.IntegerOps,
+                    weights_dtype=QuantType.QInt8
+                )
+            )
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(model_dir)
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = os.cpu_count() or 1
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name="model_quantized.onnx",
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+
+    def encode(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False) -> np.ndarray:
+        """Encode texts into sentence embeddings"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                return_tensors="np"
+            )
+            token_embeddings = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+
+            # Mean pooling over real (non-padding) tokens
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled)
+
+        if not batches:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return np.concatenate(batches)
+
 class EmbeddingService:
     """Embedding service with SBERT and vector database"""
 
@@ -18,7 +121,17 @@ class EmbeddingService:
         self.sbert_config = sbert_config
         self.vector_db_config = vector_db_config
         self.sbert_model = None
+        self.encode_batch_size = ENCODE_BATCH_SIZE
         self.vector_db = None
+        # Blocking model and index calls run off the event loop; single
+        # workers keep GPU use serialized and FAISS access thread-safe
+        self._encoder_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sbert")
+        self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss")
+        # Micro-batching queue of (text, future) fed to a single worker task
+        self._encode_queue: Optional[asyncio.Queue] = None
+        self._encode_task: Optional[asyncio.Task] = None
+        # "int8" stores vectors scalar-quantized (4x smaller); "none" keeps float32
+        self.quantization = vector_db_config.get("quantization", "int8")
         self.initialized = False
 
     async def initialize(self):
@@ -37,13 +150,16 @@ class EmbeddingService:
             except ImportError:
                 logger.warning("psutil not available, proceeding without disk check")
 
-            # Initialize SBERT
+            # Load SBERT off the loop while the vector database connects
             logger.info(f"Loading SBERT model: {self.sbert_config['model']}")
-            from sentence_transformers import SentenceTransformer
-            self.sbert_model = SentenceTransformer(self.sbert_config['model'])
+            self.sbert_model, _ = await asyncio.gather(
+                asyncio.to_thread(self._load_sbert),
+                self._initialize_vector_db()
+            )
 
-            # Initialize vector database
-            await self._initialize_vector_db()
+            # Start the micro-batching encoder
+            self._encode_queue = asyncio.Queue()
+            self._encode_task = asyncio.create_task(self._encode_worker())
 
             self.initialized = True
             logger.info("✅ Embedding Service initialized successfully")
@@ -52,6 +168,38 @@ class EmbeddingService:
             logger.error(f"Failed to initialize Embedding service: {e}")
             raise
 
+    def _load_sbert(self):
+        """Load SBERT on the GPU in half precision when available, else CPU FP32"""
+        if self.sbert_config.get("backend") == "onnx":
+            model_dir = self.sbert_config.get("onnx_dir", "./models/sbert-onnx-int8")
+            logger.info("SBERT running on ONNX Runtime (CPU, INT8)")
+            return OnnxSentenceEncoder(self.sbert_config['model'], model_dir)
+
+        from sentence_transformers import SentenceTransformer
+
+        device = "cpu"
+        if self.sbert_config.get("use_gpu"):
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    device = "cuda"
+            except ImportError:
+                pass
+
+        model = SentenceTransformer(self.sbert_config['model'], device=device)
+
+        if device == "cuda":
+            import torch
+            # bf16 keeps FP32 range on Ampere+; older GPUs use FP16
+            if torch.cuda.is_bf16_supported():
+                model = model.to(torch.bfloat16)
+            else:
+                model = model.half()
+            self.encode_batch_size = GPU_ENCODE_BATCH_SIZE
+
+        logger.info(f"SBERT running on {device} ({next(model.parameters()).dtype})")
+        return model
+
     async def _initialize_vector_db(self):
         """Initialize vector database"""
         db_type = self.vector_db_config['type']
@@ -64,7 +212,7 @@ class EmbeddingService:
             await self._init_faiss()
         else:
             logger.warning(f"Unknown vector DB type: {db_type}, using in-memory fallback")
-            self.vector_db = {"type": "memory", "data": {}}
+            self.vector_db = self._memory_store()
 
     async def _init_weaviate(self):
         """Initialize Weaviate client"""
@@ -92,7 +240,7 @@ class EmbeddingService:
 
         except Exception as e:
             logger.warning(f"Weaviate not available: {e}, falling back to memory")
-            self.vector_db = {"type": "memory", "data": {}}
+            self.vector_db = self._memory_store()
 
     async def _init_chromadb(self):
         """Initialize ChromaDB client"""
@@ -107,174 +255,466 @@ class EmbeddingService:
             # Create or get collection
             collection_name = self.vector_db_config['collection']
             self.vector_db["collection"] = self.vector_db["client"].get_or_create_collection(
-                name=collection_name
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"}  # Default is L2
             )
 
             logger.info(f"ChromaDB initialized with collection: {collection_name}")
 
         except Exception as e:
             logger.warning(f"ChromaDB not available: {e}, falling back to memory")
-            self.vector_db = {"type": "memory", "data": {}}
+            self.vector_db = self._memory_store()
 
     async def _init_faiss(self):
-        """Initialize FAISS index"""
+        """Initialize FAISS index, restoring a persisted one if present"""
         try:
             import faiss
 
             self.vector_db = {
                 "type": "faiss",
-                "index": faiss.IndexFlatIP(384),  # Cosine similarity for 384-dim embeddings
+                "index": None,
                 "data": [],  # Store text and metadata
-                "ids": []
+                "ids": [],
+                "pending": [],  # Vectors awaiting a batched add()
+                "unsaved": 0  # Inserts since the last write to disk
             }
 
-            logger.info("FAISS initialized")
+            # Use every core for add/search
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
+
+            index_path, meta_path = self._faiss_paths()
+            if os.path.exists(index_path) and os.path.exists(meta_path):
+                self.vector_db["index"] = faiss.read_index(index_path)
+                with open(meta_path, "rb") as f:
+                    meta = pickle.load(f)
+                self.vector_db["data"] = meta["data"]
+                self.vector_db["ids"] = meta["ids"]
+                logger.info(f"FAISS index restored with {self.vector_db['index'].ntotal} vectors")
+            else:
+                self.vector_db["index"] = self._build_faiss_index(faiss)
+                logger.info("FAISS initialized")
+
+            # Last-chance save if the process exits without close()
+            atexit.register(self._persist_at_exit)
 
         except Exception as e:
             logger.warning(f"FAISS not available: {e}, falling back to memory")
-            self.vector_db = {"type": "memory", "data": {}}
+            self.vector_db = self._memory_store()
+
+    def _build_faiss_index(self, faiss):
+        """HNSW graph index; inner product on unit vectors is cosine similarity"""
+        if self.quantization == "int8":
+            index = faiss.IndexHNSWSQ(
+                EMBEDDING_DIM, faiss.ScalarQuantizer.QT_8bit, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            # Unit-vector components lie in [-1, 1]; fixing the range up front
+            # means the quantizer needs no training corpus
+            bounds = np.stack([-np.ones(EMBEDDING_DIM), np.ones(EMBEDDING_DIM)]).astype(np.float32)
+            index.train(bounds)
+        else:
+            index = faiss.IndexHNSWFlat(EMBEDDING_DIM, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        return index
+
+    def _faiss_paths(self):
+        """Index and metadata file locations for the FAISS store"""
+        base = self.vector_db_config.get("path", "./faiss_db")
+        return os.path.join(base, "index.bin"), os.path.join(base, "meta.pkl")
+
+    async def _run_encoder(self, func, *args):
+        """Run a blocking SBERT call on the dedicated encoder thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._encoder_executor, functools.partial(func, *args))
+
+    async def _run_index(self, func, *args):
+        """Run a blocking FAISS call; one thread keeps adds and searches ordered"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._index_executor, functools.partial(func, *args))
+
+    async def _flush_faiss(self):
+        """Add buffered vectors to the FAISS index in a single call"""
+        pending = self.vector_db["pending"]
+        if pending:
+            # Drain on the event loop so concurrent stores are never lost
+            batch = np.vstack(pending)
+            pending.clear()
+            await self._run_index(self.vector_db["index"].add, batch)
+
+    def _save_faiss(self):
+        """Write the FAISS index and its metadata to disk atomically"""
+        import faiss
+
+        index = self.vector_db["index"]
+        # Rows whose vectors are still pending are left for the next save so
+        # the metadata never runs ahead of the index
+        count = index.ntotal
+        meta = {"data": self.vector_db["data"][:count], "ids": self.vector_db["ids"][:count]}
+
+        index_path, meta_path = self._faiss_paths()
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        faiss.write_index(index, index_path + ".tmp")
+        with open(meta_path + ".tmp", "wb") as f:
+            pickle.dump(meta, f)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    async def _checkpoint_faiss(self):
+        """Flush pending vectors and persist the index"""
+        self.vector_db["unsaved"] = 0
+        await self._flush_faiss()
+        await self._run_index(self._save_faiss)
+
+    def _persist_at_exit(self):
+        """atexit hook: synchronously save inserts that were never checkpointed"""
+        if not self.vector_db or self.vector_db.get("type") != "faiss":
+            return
+        if not self.vector_db["unsaved"] and not self.vector_db["pending"]:
+            return
+        try:
+            if self.vector_db["pending"]:
+                self.vector_db["index"].add(np.vstack(self.vector_db["pending"]))
+                self.vector_db["pending"].clear()
+            self._save_faiss()
+            self.vector_db["unsaved"] = 0
+        except Exception as e:
+            logger.error(f"Error saving FAISS index at exit: {e}")
 
     async def close(self):
         """Close embedding service"""
-        # Vector DB clients don't need explicit closing
-        pass
+        if self._encode_task:
+            self._encode_task.cancel()
+            try:
+                await self._encode_task
+            except asyncio.CancelledError:
+                pass
+            # Fail anything still queued so no caller waits on a future forever
+            error = RuntimeError("Embedding service closed")
+            while not self._encode_queue.empty():
+                _, future = self._encode_queue.get_nowait()
+                if not future.done():
+                    future.set_exception(error)
+            self._encode_task = None
+            self._encode_queue = None
+
+        # Vector DB clients don't need explicit closing; FAISS is persisted
+        if self.vector_db and self.vector_db.get("type") == "faiss":
+            try:
+                await self._checkpoint_faiss()
+            except Exception as e:
+                logger.error(f"Error saving FAISS index: {e}")
+
+        self._encoder_executor.shutdown(wait=False)
+        self._index_executor.shutdown(wait=False)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one batched forward pass into unit-norm float32 rows
+
+        Every stored vector and every query comes through here, which is what
+        lets the stores use a plain inner product as cosine similarity.
+        """
+        embeddings = self.sbert_model.encode(
+            texts,
+            batch_size=self.encode_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    async def _encode_async(self, texts: List[str]) -> np.ndarray:
+        """Encode off the event loop; single texts are coalesced by the micro-batcher"""
+        if len(texts) == 1 and self._encode_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            await self._encode_queue.put((texts[0], future))
+            return (await future)[None, :]
+        return await self._run_encoder(self._encode, texts)
+
+    async def _encode_worker(self):
+        """Collect queued texts for up to MICRO_BATCH_MAX_WAIT and encode them together"""
+        loop = asyncio.get_running_loop()
+        items = []
+        try:
+            while True:
+                items = [await self._encode_queue.get()]
+                deadline = loop.time() + MICRO_BATCH_MAX_WAIT
+                while len(items) < MICRO_BATCH_MAX_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        items.append(await asyncio.wait_for(self._encode_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                try:
+                    embeddings = await self._run_encoder(self._encode, [text for text, _ in items])
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), embedding in zip(items, embeddings):
+                    if not future.done():
+                        future.set_result(embedding)
+        except asyncio.CancelledError:
+            # close() cancelled us mid-batch; these futures are already off the queue
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding service closed"))
+            raise
 
     async def embed_text(self, text: str, metadata: Dict = None) -> Dict:
-        """Generate embeddings for text and optionally store"""
+        """Generate embeddings for text and optionally store
+
+        Deprecated for service-to-service use: the JSON float list is ~6x
+        larger than embed_text_raw()'s base64 float32 payload.
+        """
+        results = await self.embed_texts([text], [metadata] if metadata else None)
+        return results[0]
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-norm float32 embeddings of texts, without storing them"""
+        if not self.initialized or self.sbert_model is None:
+            raise RuntimeError("Embedding service not initialized")
+        return await self._encode_async(texts)
+
+    async def embed_text_raw(self, text: str, metadata: Dict = None) -> Dict:
+        """Generate embeddings for text as base64-encoded little-endian float32 bytes
+
+        Decode with np.frombuffer(base64.b64decode(b64), dtype="<f4").reshape(shape).
+        """
+        results = await self.embed_texts([text], [metadata] if metadata else None, as_base64=True)
+        return results[0]
+
+    async def embed_texts(self, texts: List[str], metadatas: Optional[List[Dict]] = None,
+                          as_base64: bool = False) -> List[Dict]:
+        """Generate embeddings for several texts in one batch and optionally store"""
         try:
             if not self.initialized:
                 raise RuntimeError("Embedding service not initialized")
 
-            # Generate embedding
-            embedding = self.sbert_model.encode(text).tolist()
-
-            result = {
-                "text": text,
-                "embedding": embedding,
-                "dimension": len(embedding),
-                "model": self.sbert_config['model']
-            }
+            # Generate embeddings; vectors stay as ndarrays until the JSON boundary
+            embeddings = await self._encode_async(texts)
+            # One timestamp for the whole batch
+            timestamp = self._get_timestamp()
 
-            # Store if metadata provided
-            if metadata:
-                await self._store_embedding(text, embedding, metadata)
-                result["stored"] = True
-                result["id"] = metadata.get("id", f"doc_{len(self.vector_db.get('data', {}))}")
+            results = []
+            for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+                result = {
+                    "text": text,
+                    "dimension": len(embedding),
+                    "model": self.sbert_config['model']
+                }
+                if as_base64:
+                    result["embedding_b64"] = base64.b64encode(embedding.astype("<f4").tobytes()).decode("ascii")
+                    result["dtype"] = "float32"
+                    result["shape"] = list(embedding.shape)
+                else:
+                    result["embedding"] = embedding.tolist()
+
+                # Store if metadata provided
+                metadata = metadatas[i] if metadatas else None
+                if metadata:
+                    doc_id = await self._store_embedding(text, embedding, metadata, timestamp)
+                    result["stored"] = doc_id is not None
+                    result["id"] = doc_id
+
+                result["timestamp"] = timestamp
+                results.append(result)
 
-            result["timestamp"] = self._get_timestamp()
-            return result
+            return results
 
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            return {"error": str(e)}
+            return [{"error": str(e)} for _ in texts]
 
-    async def _store_embedding(self, text: str, embedding: List[float], metadata: Dict):
-        """Store embedding in vector database"""
+    async def _store_embedding(self, text: str, embedding: np.ndarray, metadata: Dict,
+                               timestamp: str) -> Optional[str]:
+        """Store embedding in vector database; returns the stored id, or None on failure"""
         try:
             db_type = self.vector_db.get("type")
 
             if db_type == "weaviate":
-                await self._store_weaviate(text, embedding, metadata)
+                return await self._store_weaviate(text, embedding, metadata, timestamp)
             elif db_type == "chromadb":
-                await self._store_chromadb(text, embedding, metadata)
+                return await self._store_chromadb(text, embedding, metadata, timestamp)
             elif db_type == "faiss":
-                await self._store_faiss(text, embedding, metadata)
+                return await self._store_faiss(text, embedding, metadata, timestamp)
             else:
                 # Memory fallback
-                doc_id = metadata.get("id", f"doc_{len(self.vector_db['data'])}")
-                self.vector_db["data"][doc_id] = {
-                    "text": text,
-                    "embedding": embedding,
-                    "metadata": metadata,
-                    "timestamp": self._get_timestamp()
-                }
+                return self._store_memory(text, embedding, metadata, timestamp)
 
         except Exception as e:
             logger.error(f"Error storing embedding: {e}")
+            return None
+
+    def _memory_store(self) -> Dict:
+        """Empty in-memory vector store: a growable matrix of unit-norm rows"""
+        # Struct-of-arrays: row i of every column describes the same document
+        return {
+            "type": "memory",
+            "matrix": None,  # Allocated on first insert, capacity doubles
+            "scales": None,  # Per-row dequantization scale (int8 only)
+            "size": 0,
+            "ids": [],
+            "texts": [],
+            "metas": [],
+            "timestamps": [],
+            "rows": {}  # doc_id -> matrix row
+        }
+
+    def _quantize(self, unit_vector: np.ndarray):
+        """Symmetric per-vector int8 quantization; returns (codes, scale)"""
+        scale = float(np.abs(unit_vector).max()) / 127.0 or 1.0
+        codes = np.round(unit_vector / scale).clip(-128, 127).astype(np.int8)
+        return codes, scale
+
+    def _store_memory(self, text: str, embedding: np.ndarray, metadata: Dict, timestamp: str) -> str:
+        """Store in the in-memory matrix, overwriting an existing id in place"""
+        store = self.vector_db
+        doc_id = metadata.get("id", f"doc_{store['size']}")
+        # _encode() yields unit-norm rows, so no normalization is needed here
+        row_vector = embedding.astype(np.float32, copy=False)
+
+        row = store["rows"].get(doc_id)
+        if row is None:
+            row = store["size"]
+            matrix = store["matrix"]
+            if matrix is None:
+                dtype = np.int8 if self.quantization == "int8" else np.float32
+                matrix = np.empty((MEMORY_INITIAL_CAPACITY, row_vector.shape[0]), dtype=dtype)
+                store["scales"] = np.ones(MEMORY_INITIAL_CAPACITY, dtype=np.float32)
+            elif row == matrix.shape[0]:
+                # Amortised O(1) append
+                grown = np.empty((matrix.shape[0] * 2, matrix.shape[1]), dtype=matrix.dtype)
+                grown[:row] = matrix
+                matrix = grown
+                scales = np.ones(matrix.shape[0], dtype=np.float32)
+                scales[:row] = store["scales"][:row]
+                store["scales"] = scales
+            store["matrix"] = matrix
+            store["size"] = row + 1
+            store["ids"].append(doc_id)
+            store["texts"].append(text)
+            store["metas"].append(metadata)
+            store["timestamps"].append(timestamp)
+            store["rows"][doc_id] = row
+        else:
+            store["texts"][row] = text
+            store["metas"][row] = metadata
+            store["timestamps"][row] = timestamp
+
+        if store["matrix"].dtype == np.int8:
+            store["matrix"][row], store["scales"][row] = self._quantize(row_vector)
+        else:
+            store["matrix"][row] = row_vector
+
+        return doc_id
 
-    async def _store_weaviate(self, text: str, embedding: List[float], metadata: Dict):
+    async def _store_weaviate(self, text: str, embedding: np.ndarray, metadata: Dict, timestamp: str):
         """Store in Weaviate"""
         collection = self.vector_db_config['collection']
         doc_data = {
             "text": text,
             "metadata": metadata,
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp
         }
 
-        self.vector_db["client"].data_object.create(
+        return self.vector_db["client"].data_object.create(
             doc_data,
             collection,
-            vector=embedding
+            vector=embedding.tolist()
         )
 
-    async def _store_chromadb(self, text: str, embedding: List[float], metadata: Dict):
+    async def _store_chromadb(self, text: str, embedding: np.ndarray, metadata: Dict, timestamp: str):
         """Store in ChromaDB"""
         doc_id = metadata.get("id", f"doc_{self.vector_db['collection'].count()}")
 
         self.vector_db["collection"].add(
             ids=[doc_id],
-            embeddings=[embedding],
+            embeddings=[embedding.tolist()],
             documents=[text],
             metadatas=[metadata]
         )
+        return doc_id
 
-    async def _store_faiss(self, text: str, embedding: List[float], metadata: Dict):
+    async def _store_faiss(self, text: str, embedding: np.ndarray, metadata: Dict, timestamp: str):
         """Store in FAISS"""
         doc_id = metadata.get("id", f"doc_{len(self.vector_db['data'])}")
 
-        # Add to FAISS index
-        embedding_np = np.array([embedding], dtype=np.float32)
-        self.vector_db["index"].add(embedding_np)
-
-        # Store data
+        # Store data and buffer the vector together so row order always
+        # matches index order, even while a flush is in flight
         self.vector_db["data"].append({
             "id": doc_id,
             "text": text,
             "metadata": metadata,
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp
         })
         self.vector_db["ids"].append(doc_id)
 
-    async def search_similar(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search for similar content"""
+        # Buffer for the FAISS index; HNSW inserts are cheaper in batches
+        self.vector_db["pending"].append(embedding.reshape(1, -1))
+        self.vector_db["unsaved"] += 1
+
+        if self.vector_db["unsaved"] >= FAISS_SAVE_INTERVAL:
+            await self._checkpoint_faiss()
+        elif len(self.vector_db["pending"]) >= FAISS_ADD_BATCH_SIZE:
+            await self._flush_faiss()
+
+        return doc_id
+
+    async def search_similar(self, query: Union[str, List[str]], limit: int = 5) -> List:
+        """Search for similar content
+
+        A single query returns a list of hits; a list of queries is encoded
+        in one batch and returns one list of hits per query.
+        """
         try:
             if not self.initialized:
                 raise RuntimeError("Embedding service not initialized")
 
-            # Generate query embedding
-            query_embedding = self.sbert_model.encode(query).tolist()
+            queries = [query] if isinstance(query, str) else list(query)
+
+            # Generate query embeddings
+            query_embeddings = await self._encode_async(queries)
 
             # Search vector database
-            results = await self._search_vector_db(query_embedding, limit)
+            results = await self._search_vector_db(query_embeddings, limit)
 
-            return results
+            return results[0] if isinstance(query, str) else results
 
         except Exception as e:
             logger.error(f"Error in similarity search: {e}")
             return [{"error": str(e)}]
 
-    async def _search_vector_db(self, query_embedding: List[float], limit: int) -> List[Dict]:
-        """Search vector database"""
+    async def _search_vector_db(self, query_embeddings: np.ndarray, limit: int) -> List[List[Dict]]:
+        """Search vector database for each row of query_embeddings"""
         db_type = self.vector_db.get("type")
 
+        if db_type == "faiss":
+            # FAISS searches all queries in one call
+            return await self._search_faiss(query_embeddings, limit)
+
         if db_type == "weaviate":
-            return await self._search_weaviate(query_embedding, limit)
+            search = self._search_weaviate
         elif db_type == "chromadb":
-            return await self._search_chromadb(query_embedding, limit)
-        elif db_type == "faiss":
-            return await self._search_faiss(query_embedding, limit)
+            search = self._search_chromadb
         else:
             # Memory search
-            return await self._search_memory(query_embedding, limit)
+            search = self._search_memory
 
-    async def _search_weaviate(self, query_embedding: List[float], limit: int) -> List[Dict]:
+        return [await search(query_embedding, limit) for query_embedding in query_embeddings]
+
+    async def _search_weaviate(self, query_embedding: np.ndarray, limit: int) -> List[Dict]:
         """Search Weaviate"""
         collection = self.vector_db_config['collection']
 
         result = self.vector_db["client"].query.get(
             collection, ["text", "metadata", "timestamp"]
         ).with_near_vector({
-            "vector": query_embedding
+            "vector": query_embedding.tolist()
         }).with_limit(limit).do()
 
         hits = result.get("data", {}).get("Get", {}).get(collection, [])
@@ -285,10 +725,10 @@ class EmbeddingService:
             "score": hit.get("_additional", {}).get("certainty", 0)
         } for hit in hits]
 
-    async def _search_chromadb(self, query_embedding: List[float], limit: int) -> List[Dict]:
+    async def _search_chromadb(self, query_embedding: np.ndarray, limit: int) -> List[Dict]:
         """Search ChromaDB"""
         results = self.vector_db["collection"].query(
-            query_embeddings=[query_embedding],
+            query_embeddings=[query_embedding.tolist()],
             n_results=limit
         )
 
@@ -304,51 +744,63 @@ class EmbeddingService:
             results["distances"][0]
         )]
 
-    async def _search_faiss(self, query_embedding: List[float], limit: int) -> List[Dict]:
+    async def _search_faiss(self, query_embeddings: np.ndarray, limit: int) -> List[List[Dict]]:
         """Search FAISS"""
-        query_np = np.array([query_embedding], dtype=np.float32)
-        scores, indices = self.vector_db["index"].search(query_np, limit)
-
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.vector_db["data"]):
-                doc = self.vector_db["data"][idx]
-                results.append({
-                    "text": doc["text"],
-                    "metadata": doc["metadata"],
-                    "score": float(score),
-                    "id": doc["id"]
-                })
-
-        return results
-
-    async def _search_memory(self, query_embedding: List[float], limit: int) -> List[Dict]:
-        """Search in-memory storage"""
-        import numpy as np
-
-        results = []
-        query_np = np.array(query_embedding)
-
-        for doc_id, doc in self.vector_db["data"].items():
-            doc_embedding = np.array(doc["embedding"])
-            similarity = np.dot(query_np, doc_embedding) / (
-                np.linalg.norm(query_np) * np.linalg.norm(doc_embedding)
-            )
+        # Make buffered inserts visible before querying
+        await self._flush_faiss()
+        scores, indices = await self._run_index(self.vector_db["index"].search, query_embeddings, limit)
+
+        all_results = []
+        for query_scores, query_indices in zip(scores, indices):
+            results = []
+            for score, idx in zip(query_scores, query_indices):
+                if 0 <= idx < len(self.vector_db["data"]):
+                    doc = self.vector_db["data"][idx]
+                    results.append({
+                        "text": doc["text"],
+                        "metadata": doc["metadata"],
+                        "score": float(score),
+                        "id": doc["id"]
+                    })
+            all_results.append(results)
+
+        return all_results
+
+    async def _search_memory(self, query_embedding: np.ndarray, limit: int) -> List[Dict]:
+        """Search in-memory storage with one matrix-vector product"""
+        size = self.vector_db["size"]
+        if size == 0 or limit <= 0:
+            return []
+
+        # Query and rows are unit-norm, so the dot product is the cosine
+        # similarity; int8 rows are rescaled by their dequantization factor
+        matrix = self.vector_db["matrix"][:size]
+        query = query_embedding.astype(np.float32, copy=False)
+        if matrix.dtype == np.int8:
+            # Score the int8 codes directly against an int16-quantized query with
+            # int32 accumulation, so the matrix is never upcast to float32
+            levels = min(32767, (2**31 - 1) // (128 * matrix.shape[1]))
+            query_scale = float(np.abs(query).max()) / levels or 1.0
+            query_codes = np.round(query / query_scale).astype(np.int16)
+            scores = np.einsum('ij,j->i', matrix, query_codes, dtype=np.int32).astype(np.float32)
+            scores *= self.vector_db["scales"][:size] * np.float32(query_scale)
+        else:
+            scores = matrix @ query
 
-            results.append({
-                "text": doc["text"],
-                "metadata": doc["metadata"],
-                "score": float(similarity),
-                "id": doc_id
-            })
+        k = min(limit, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
 
-        # Sort by similarity and limit
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:limit]
+        store = self.vector_db
+        return [{
+            "text": store["texts"][row],
+            "metadata": store["metas"][row],
+            "score": float(scores[row]),
+            "id": store["ids"][row]
+        } for row in top]
 
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.now().isoformat()
 
     async def health_check(self) -> Dict:
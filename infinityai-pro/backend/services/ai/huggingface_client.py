@@ -8,9 +8,18 @@ import os
 import logging
 from typing import Dict, Any, Optional
 import asyncio
+import aiohttp
+import orjson
+
+from .response_cache import ExactResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Exact-match response cache settings
+CACHE_TTL_SECONDS = 3600
+CACHE_DIR = "./cache/huggingface"
+CACHE_MAX_ENTRIES = 1000
+
 class HuggingFaceClient:
     """
     HuggingFace client for fallback AI operations
@@ -18,26 +27,83 @@ class HuggingFaceClient:
 
     def __init__(self):
         self.api_key = os.getenv("HUGGINGFACE_API_KEY", "")
-        self.base_url = "https://api-inference.huggingface.co/models"
+        self.base_url = "https://api-inference.huggingface.co"
+        self.model = os.getenv("HUGGINGFACE_MODEL", "mistralai/Mistral-7B-Instruct-v0.2")
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._cache = ExactResponseCache(CACHE_TTL_SECONDS, CACHE_DIR, CACHE_MAX_ENTRIES)
+        # SemanticResponseCache, attached by AIManager once embeddings are available
+        self.semantic_cache = None
         self.initialized = False
 
     async def initialize(self):
         """Initialize HuggingFace client"""
         if not self.api_key:
             logger.warning("No HuggingFace API key found - using as fallback only")
+        elif self.session is None:
+            # One pooled keep-alive session for every inference call
+            self.session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=90),
+                timeout=aiohttp.ClientTimeout(total=60, connect=5)
+            )
         self.initialized = True
         logger.info("HuggingFace client initialized")
 
     async def chat(self, message: str, context: Optional[Dict] = None) -> Dict:
         """Generate chat response using HuggingFace"""
         try:
-            # For now, return a simple fallback response
-            # In production, implement actual HuggingFace API calls
-            return {
-                "response": f"HuggingFace fallback: {message}",
-                "model": "fallback",
+            if not self.session:
+                # No API key configured: echo-style fallback
+                return {
+                    "response": f"HuggingFace fallback: {message}",
+                    "model": "fallback",
+                    "confidence": 0.5
+                }
+
+            # Context-free prompts without volatile tokens can be answered
+            # from a paraphrase seen before
+            embedding = None
+            if self.semantic_cache is not None and context is None and self.semantic_cache.cacheable(message):
+                try:
+                    cached, embedding = await self.semantic_cache.get(message)
+                    if cached is not None:
+                        return {**cached, "cache": "HIT"}
+                except Exception as e:
+                    logger.warning(f"Semantic cache lookup failed: {e}")
+
+            model = (context or {}).get("model", self.model)
+            path = f"/models/{model}"
+            payload = {
+                "inputs": message,
+                "parameters": {"max_new_tokens": 512, "return_full_text": False}
+            }
+
+            key = self._cache.key(path, payload)
+            result = await self._cache.get(key)
+            if result is None:
+                async with self.session.post(
+                    path,
+                    data=orjson.dumps(payload),
+                    headers={"Content-Type": "application/json"}
+                ) as response:
+                    result = orjson.loads(await response.read())
+                    if response.status == 200:
+                        await self._cache.put(key, result)
+
+            if isinstance(result, dict) and "error" in result:
+                return {"error": result["error"], "model": model}
+
+            # Text-generation models return [{"generated_text": ...}]
+            generated = result[0].get("generated_text", "") if isinstance(result, list) and result else ""
+            reply = {
+                "response": generated,
+                "model": model,
                 "confidence": 0.5
             }
+            if embedding is not None:
+                self.semantic_cache.put(embedding, reply)
+            return reply
         except Exception as e:
             logger.error(f"HuggingFace chat error: {e}")
             return {"error": str(e)}
@@ -52,7 +118,10 @@ class HuggingFaceClient:
 
     async def close(self):
         """Close HuggingFace client"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
         self.initialized = False
 
 # Global instance
-hf_client = HuggingFaceClient()
\ No newline at end of file
+hf_client = HuggingFaceClient()
@@ -4,14 +4,75 @@ InfinityAI.Pro - LLM Service
 Local LLM integration using Ollama (LLaMA3, Mistral, etc.)
 """
 
+import re
 import httpx
-import json
+import orjson
+import asyncio
 import logging
-from typing import Dict, Optional, Any
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Strategy response parsing: every keyword the parser looks for, tagged by
+# what it signals. Matching is by substring (e.g. "monitoring" hits "monitor")
+_PCT_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+_KEYWORD_TAGS = {
+    'risk': 'risk', 'position': 'position', 'stop': 'stop',
+    'low': 'risk_low', 'minimal': 'risk_low', 'small': 'risk_low',
+    'high': 'risk_high', 'significant': 'risk_high', 'large': 'risk_high',
+    'monitor': 'monitor', 'watch': 'monitor', 'key': 'monitor', 'important': 'monitor'
+}
+
+# One Aho-Corasick automaton tags a line in a single scan; without the C
+# extension a single compiled alternation does the same job
+try:
+    import ahocorasick
+
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _word, _tag in _KEYWORD_TAGS.items():
+        _KEYWORD_AUTOMATON.add_word(_word, _tag)
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
+    _KEYWORD_RE = re.compile('|'.join(_KEYWORD_TAGS))
+
+
+def _line_tags(line_lower: str) -> set:
+    """Tags of every keyword occurring in a lowercased line"""
+    if _KEYWORD_AUTOMATON is not None:
+        return {tag for _, tag in _KEYWORD_AUTOMATON.iter(line_lower)}
+    return {_KEYWORD_TAGS[word] for word in _KEYWORD_RE.findall(line_lower)}
+
+SYSTEM_PROMPT = "You are InfinityAI.Pro, an expert AI trading assistant. Provide clear, actionable insights for trading decisions."
+
+# Strategy responses kept for repeated evaluations of the same signal
+STRATEGY_CACHE_SIZE = 512
+
+
+def _context_json(context: Optional[Dict]) -> Optional[str]:
+    """Compact, key-sorted JSON for prompts and cache keys; indentation only costs prompt tokens"""
+    if not context:
+        return None
+    return orjson.dumps(
+        context,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        default=str
+    ).decode()
+
+
+def _signal_key(signal_data: Dict, context_json: Optional[str]) -> tuple:
+    """Canonical cache key: the signal fields the prompt uses, rounded, plus the context"""
+    return (
+        signal_data.get('symbol'),
+        signal_data.get('direction'),
+        round(signal_data.get('score', 0.0), 2),
+        round(signal_data.get('ml_prob', 0.0), 2),
+        round(signal_data.get('rule_score', 0.0), 2),
+        context_json
+    )
+
 class LLMService:
     """Local LLM service using Ollama"""
 
@@ -19,13 +80,22 @@ class LLMService:
         self.config = config
         self.client: Optional[httpx.AsyncClient] = None
         self.initialized = False
+        self._strategy_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._strategy_cache_hits = 0
+        self._strategy_cache_misses = 0
+        # SemanticResponseCache, attached by AIManager once embeddings are available
+        self.semantic_cache = None
 
     async def initialize(self):
         """Initialize Ollama connection"""
         try:
+            # One pooled client for all requests; Ollama serves concurrent
+            # requests up to OLLAMA_NUM_PARALLEL on the server side
             self.client = httpx.AsyncClient(
                 base_url=self.config['url'],
-                timeout=self.config['timeout']
+                timeout=httpx.Timeout(self.config['timeout'], connect=5.0),
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0),
+                http2=True
             )
 
             # Test connection
@@ -47,7 +117,7 @@ class LLMService:
         try:
             response = await self.client.get("/api/tags")
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             available_models = [model['name'] for model in data.get('models', [])]
             if self.config['model'] not in available_models:
@@ -58,57 +128,99 @@ class LLMService:
         except Exception as e:
             logger.warning(f"Could not verify Ollama models: {e}")
 
-    async def chat(self, message: str, context: Optional[Dict] = None) -> Dict:
-        """Generate chat response"""
-        try:
-            if not self.initialized:
-                raise RuntimeError("LLM service not initialized")
-
-            # Build prompt with context
-            system_prompt = "You are InfinityAI.Pro, an expert AI trading assistant. Provide clear, actionable insights for trading decisions."
-
-            if context:
-                system_prompt += f"\n\nContext: {json.dumps(context, indent=2)}"
-
-            payload = {
-                "model": self.config['model'],
-                "prompt": message,
-                "system": system_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "num_predict": 512
-                }
+    def _build_payload(self, message: str, context: Optional[Dict], stream: bool) -> Dict:
+        """Build the Ollama /api/generate request body"""
+        system_prompt = SYSTEM_PROMPT
+        if context:
+            system_prompt = f"{SYSTEM_PROMPT}\n\nContext: {_context_json(context)}"
+
+        return {
+            "model": self.config['model'],
+            "prompt": message,
+            "system": system_prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.3,
+                "top_p": 0.9,
+                "num_predict": 512
             }
+        }
 
-            response = await self.client.post("/api/generate", json=payload)
+    async def chat_stream(self, message: str, context: Optional[Dict] = None,
+                          usage: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Stream a chat response, yielding tokens as Ollama produces them.
+        If a usage dict is passed it is filled from the final chunk.
+        """
+        if not self.initialized:
+            raise RuntimeError("LLM service not initialized")
+
+        payload = self._build_payload(message, context, stream=True)
+
+        # Ollama streams newline-delimited JSON, one chunk per token
+        async with self.client.stream(
+            "POST", "/api/generate",
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        ) as response:
             response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                token = chunk.get("response")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    if usage is not None:
+                        usage["eval_count"] = chunk.get("eval_count", 0)
+                        usage["eval_duration"] = chunk.get("eval_duration", 0)
+                    break
 
-            result = response.json()
+    async def chat(self, message: str, context: Optional[Dict] = None) -> Dict:
+        """Generate chat response"""
+        try:
+            # Context-free prompts without volatile tokens can be answered
+            # from a paraphrase seen before
+            embedding = None
+            if self.semantic_cache is not None and context is None and self.semantic_cache.cacheable(message):
+                try:
+                    cached, embedding = await self.semantic_cache.get(message)
+                    if cached is not None:
+                        return {**cached, "cache": "HIT", "timestamp": datetime.now().isoformat()}
+                except Exception as e:
+                    logger.warning(f"Semantic cache lookup failed: {e}")
 
-            return {
-                "response": result.get("response", ""),
+            usage = {"eval_count": 0, "eval_duration": 0}
+            tokens = [token async for token in self.chat_stream(message, context, usage)]
+
+            result = {
+                "response": "".join(tokens),
                 "model": self.config['model'],
-                "usage": {
-                    "eval_count": result.get("eval_count", 0),
-                    "eval_duration": result.get("eval_duration", 0)
-                },
+                "usage": usage,
                 "timestamp": datetime.now().isoformat()
             }
+            if embedding is not None:
+                self.semantic_cache.put(embedding, result)
+            return result
 
         except Exception as e:
             logger.error(f"Error in LLM chat: {e}")
             return {"error": str(e)}
 
-    async def generate_trading_strategy(self, signal_data: Dict, market_context: Dict = None) -> Dict:
-        """Generate trading strategy analysis"""
-        try:
-            symbol = signal_data.get('symbol', 'UNKNOWN')
-            action = signal_data.get('direction', 'HOLD')
-            score = signal_data.get('score', 0.0)
+    async def chat_many(self, messages: List[str], context: Optional[Dict] = None) -> List[Dict]:
+        """Generate responses for several messages concurrently over the shared client"""
+        return await asyncio.gather(*(self.chat(message, context) for message in messages))
+
+    def _strategy_prompt(self, signal_data: Dict, context_json: Optional[str]) -> str:
+        """Build the strategy analysis prompt for one signal"""
+        symbol = signal_data.get('symbol', 'UNKNOWN')
+        action = signal_data.get('direction', 'HOLD')
+        score = signal_data.get('score', 0.0)
 
-            prompt = f"""
+        return f"""
             Analyze this trading signal and provide a comprehensive trading strategy:
 
             Signal Details:
@@ -119,7 +231,7 @@ class LLMService:
             - Rule Score: {signal_data.get('rule_score', 0.0):.3f}
 
             Market Context:
-            {json.dumps(market_context, indent=2) if market_context else "No additional context"}
+            {context_json or "No additional context"}
 
             Provide a structured analysis including:
             1. Strategy rationale
@@ -131,25 +243,84 @@ class LLMService:
             7. Key monitoring factors
             """
 
-            response = await self.chat(prompt)
+    def _strategy_result(self, response: Dict, signal_data: Dict, generated_at: str) -> Dict:
+        """Parse a chat response into the structured strategy result"""
+        strategy = self._parse_strategy_response(response.get("response", ""), signal_data)
 
-            # Parse response into structured format
-            strategy = self._parse_strategy_response(response.get("response", ""), signal_data)
+        return {
+            "strategy": strategy,
+            "raw_response": response,
+            "generated_at": generated_at
+        }
 
-            return {
-                "strategy": strategy,
-                "raw_response": response,
-                "generated_at": datetime.now().isoformat()
-            }
+    def _strategy_cache_get(self, key: tuple) -> Optional[Dict]:
+        """Return a cached chat response for a signal key, refreshing its LRU position"""
+        response = self._strategy_cache.get(key)
+        if response is None:
+            self._strategy_cache_misses += 1
+            return None
+        self._strategy_cache.move_to_end(key)
+        self._strategy_cache_hits += 1
+        return response
+
+    def _strategy_cache_put(self, key: tuple, response: Dict):
+        """Cache a successful chat response, evicting the least recently used"""
+        if "error" in response:
+            return
+        self._strategy_cache[key] = response
+        self._strategy_cache.move_to_end(key)
+        if len(self._strategy_cache) > STRATEGY_CACHE_SIZE:
+            self._strategy_cache.popitem(last=False)
+
+    async def generate_trading_strategy(self, signal_data: Dict, market_context: Dict = None) -> Dict:
+        """Generate trading strategy analysis"""
+        try:
+            context_json = _context_json(market_context)
+            key = _signal_key(signal_data, context_json)
+            response = self._strategy_cache_get(key)
+            if response is None:
+                response = await self.chat(self._strategy_prompt(signal_data, context_json))
+                self._strategy_cache_put(key, response)
+            return self._strategy_result(response, signal_data, datetime.now().isoformat())
 
         except Exception as e:
             logger.error(f"Error generating trading strategy: {e}")
             return {"error": str(e)}
 
+    async def generate_trading_strategies(self, signals: List[Dict], market_context: Dict = None) -> List[Dict]:
+        """Generate strategy analyses for several signals concurrently"""
+        try:
+            context_json = _context_json(market_context)
+            keys = [_signal_key(signal, context_json) for signal in signals]
+            responses = [self._strategy_cache_get(key) for key in keys]
+
+            # Only signals without a cached response go to the LLM, once per key
+            missing = {}
+            for i, response in enumerate(responses):
+                if response is None:
+                    missing.setdefault(keys[i], i)
+            fresh = await self.chat_many([self._strategy_prompt(signals[i], context_json) for i in missing.values()])
+            for key, response in zip(missing, fresh):
+                self._strategy_cache_put(key, response)
+                missing[key] = response
+            responses = [missing[key] if response is None else response for key, response in zip(keys, responses)]
+
+            # One timestamp for the whole batch
+            generated_at = datetime.now().isoformat()
+            return [
+                self._strategy_result(response, signal, generated_at)
+                for response, signal in zip(responses, signals)
+            ]
+
+        except Exception as e:
+            logger.error(f"Error generating trading strategies: {e}")
+            return [{"error": str(e)} for _ in signals]
+
     def _parse_strategy_response(self, response: str, signal_data: Dict) -> Dict:
         """Parse LLM response into structured strategy"""
         # Simple parsing - could be enhanced with better NLP
         lines = response.split('\n')
+        lines_lower = response.lower().split('\n')
 
         strategy = {
             "symbol": signal_data.get('symbol', 'UNKNOWN'),
@@ -165,38 +336,33 @@ class LLMService:
         }
 
         # Extract key information from response
-        for line in lines:
-            line_lower = line.lower().strip()
+        for line, line_lower in zip(lines, lines_lower):
+            tags = _line_tags(line_lower)
+            if not tags:
+                continue
 
             # Risk level
-            if 'risk' in line_lower:
-                if any(word in line_lower for word in ['low', 'minimal', 'small']):
+            if 'risk' in tags:
+                if 'risk_low' in tags:
                     strategy['risk_level'] = 'low'
-                elif any(word in line_lower for word in ['high', 'significant', 'large']):
+                elif 'risk_high' in tags:
                     strategy['risk_level'] = 'high'
 
-            # Position size
-            if 'position' in line_lower and '%' in line:
-                try:
-                    import re
-                    percent_match = re.search(r'(\d+(?:\.\d+)?)%', line)
+            if '%' in line:
+                # Position size
+                if 'position' in tags:
+                    percent_match = _PCT_RE.search(line)
                     if percent_match:
                         strategy['position_size'] = float(percent_match.group(1)) / 100
-                except:
-                    pass
 
-            # Stop loss
-            if 'stop' in line_lower and '%' in line:
-                try:
-                    import re
-                    sl_match = re.search(r'(\d+(?:\.\d+)?)%', line)
+                # Stop loss
+                if 'stop' in tags:
+                    sl_match = _PCT_RE.search(line)
                     if sl_match:
                         strategy['stop_loss'] = float(sl_match.group(1)) / 100
-                except:
-                    pass
 
             # Monitoring points
-            if any(keyword in line_lower for keyword in ['monitor', 'watch', 'key', 'important']):
+            if 'monitor' in tags:
                 strategy['monitoring_points'].append(line.strip())
 
         return strategy
@@ -214,7 +380,13 @@ class LLMService:
             return {
                 "status": "healthy",
                 "model": self.config['model'],
-                "url": self.config['url']
+                "url": self.config['url'],
+                "strategy_cache": {
+                    "size": len(self._strategy_cache),
+                    "hits": self._strategy_cache_hits,
+                    "misses": self._strategy_cache_misses
+                },
+                "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else None
             }
 
         except Exception as e:
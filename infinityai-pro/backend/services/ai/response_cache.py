@@ -0,0 +1,190 @@
+# services/ai/response_cache.py
+"""
+InfinityAI.Pro - Response Cache
+Exact-match TTL cache for remote AI API responses, persisted to disk, and a
+semantic cache that matches paraphrased prompts by embedding similarity
+"""
+
+import os
+import re
+import asyncio
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+class ExactResponseCache:
+    """
+    Response cache keyed by SHA256 of (url, canonical JSON payload)
+    Entries live in memory and are mirrored to cache_dir so restarts keep their hits.
+    At most max_entries are kept; the least recently used entry and its file
+    are evicted first. Disk I/O runs in a worker thread, off the event loop.
+    """
+
+    def __init__(self, ttl_seconds: float, cache_dir: str, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        # key -> (expiry as time.monotonic(), response), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._swept = False
+
+    @staticmethod
+    def key(url: str, payload: Dict) -> str:
+        """SHA256 of the endpoint URL and canonicalised payload"""
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(url.encode() + body).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Tuple[float, Dict]]:
+        """Read one entry from disk, removing it if expired (runs in a thread)"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored = orjson.loads(f.read())
+            # Disk entries carry wall-clock expiry so they survive restarts
+            remaining = stored["expires_at"] - time.time()
+            if remaining <= 0:
+                os.remove(path)
+                return None
+            return time.monotonic() + remaining, stored["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, key: str, expires_at: float, response: Dict, evicted: List[str]):
+        """Write one entry and delete evicted/stale files (runs in a thread)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(key), "wb") as f:
+                f.write(orjson.dumps({"expires_at": expires_at, "response": response}))
+        except OSError as e:
+            logger.warning(f"Failed to persist cache entry: {e}")
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+        if not self._swept:
+            self._swept = True
+            self._sweep()
+
+    def _sweep(self):
+        """Trim files left by earlier runs: drop expired ones, then the oldest beyond max_entries"""
+        live = []
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    expires_at = orjson.loads(f.read())["expires_at"]
+                if expires_at <= now:
+                    os.remove(path)
+                else:
+                    live.append((os.path.getmtime(path), path))
+            except (OSError, ValueError, KeyError, TypeError):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        live.sort()
+        for _, path in live[:max(0, len(live) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Look up a response in memory, then on disk"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+
+        expiry, response = entry
+        if time.monotonic() >= expiry:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def put(self, key: str, response: Dict):
+        """Store a response in memory and persist it to disk, evicting the LRU entries"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[0])
+        await asyncio.to_thread(self._store, key, time.time() + self.ttl_seconds, response, evicted)
+
+
+# Prompts mentioning prices, quantities, dates or times ask about a moment,
+# not a topic, so a paraphrase match could return a stale answer
+_VOLATILE_RE = re.compile(r'\d{2,}|\d[.:/-]\d')
+
+class SemanticResponseCache:
+    """
+    Response cache keyed by prompt embedding: a prompt whose unit-norm
+    embedding has cosine similarity >= threshold with a cached one reuses its
+    response. Entries sit in a fixed-size ring buffer, so the oldest is
+    overwritten first once max_entries is reached.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], Awaitable[np.ndarray]], dim: int,
+                 threshold: float = 0.95, max_entries: int = 10000, ttl_seconds: float = 900):
+        self.encode = encode
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expiry = np.zeros(max_entries, dtype=np.float64)  # time.monotonic(); 0 = empty slot
+        self._responses: List[Optional[Dict]] = [None] * max_entries
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cacheable(prompt: str) -> bool:
+        """Whether a prompt is free of volatile tokens"""
+        return _VOLATILE_RE.search(prompt) is None
+
+    async def get(self, prompt: str) -> Tuple[Optional[Dict], np.ndarray]:
+        """Embed a prompt and return (closest live response or None, embedding)"""
+        embedding = (await self.encode([prompt]))[0]
+        # Dot product of unit vectors is cosine similarity; dead slots score -inf
+        scores = self._vectors @ embedding
+        scores[self._expiry <= time.monotonic()] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            self.hits += 1
+            return self._responses[best], embedding
+        self.misses += 1
+        return None, embedding
+
+    def put(self, embedding: np.ndarray, response: Dict):
+        """Store a response under its prompt embedding, overwriting the oldest slot"""
+        slot = self._next
+        self._vectors[slot] = embedding
+        self._expiry[slot] = time.monotonic() + self.ttl_seconds
+        self._responses[slot] = response
+        self._next = (slot + 1) % self.max_entries
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and live entry count"""
+        return {
+            "size": int(np.count_nonzero(self._expiry > time.monotonic())),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -7,26 +7,60 @@ Whisper integration for audio transcription
 import os
 import tempfile
 import logging
-from typing import Dict, Optional, Any
+import math
+import time
+import asyncio
+import functools
+import subprocess
+import numpy as np
+from io import BytesIO
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Optional, Any, Union
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Whisper's expected input: 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+# Uploads may arrive as a buffer or as the request's spooled file, which is read in place
+AudioInput = Union[bytes, bytearray, memoryview, IO[bytes]]
+
 class STTService:
     """Speech-to-Text service using Whisper"""
 
     def __init__(self, config: Dict):
         self.config = config
         self.model = None
+        self.backend = None
         self.initialized = False
 
+        # Decoding and inference run on one worker thread, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
     async def initialize(self):
-        """Initialize Whisper model"""
+        """Initialize Whisper model, preferring faster-whisper (CTranslate2) when installed"""
         try:
-            import whisper
-
             logger.info(f"Loading Whisper model: {self.config['model']}")
-            self.model = whisper.load_model(self.config['model'])
+            try:
+                from faster_whisper import WhisperModel
+                import ctranslate2
+
+                device = self.config.get('device', 'auto')
+                on_gpu = device == 'cuda' or (device == 'auto' and ctranslate2.get_cuda_device_count() > 0)
+                compute_type = self.config.get('compute_type') or ('float16' if on_gpu else 'int8')
+
+                self.model = WhisperModel(self.config['model'], device=device, compute_type=compute_type)
+                self.backend = "faster-whisper"
+                logger.info(f"Whisper running on CTranslate2 ({compute_type})")
+            except ImportError:
+                import whisper
+
+                self.model = whisper.load_model(self.config['model'])
+                self.backend = "whisper"
+
+            await self._run_in_executor(self._warmup)
 
             self.initialized = True
             logger.info("✅ STT Service initialized successfully")
@@ -37,53 +71,138 @@ class STTService:
 
     async def close(self):
         """Close STT service"""
-        # Whisper models don't need explicit closing
-        pass
+        self._executor.shutdown(wait=False)
+
+    async def _run_in_executor(self, func, *args):
+        """Run blocking decode/inference on the Whisper worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
 
-    async def transcribe(self, audio_data: bytes, filename: str = None) -> Dict:
+    async def transcribe(self, audio_data: AudioInput, filename: str = None) -> Dict:
         """Transcribe audio to text"""
         try:
             if not self.initialized:
                 raise RuntimeError("STT service not initialized")
 
-            # Save audio data to temporary file
+            # Transcribe audio
+            result = await self._run_in_executor(self._transcribe_bytes, audio_data, filename)
+
+            # Extract key information
+            transcription = {
+                "text": result.get("text", "").strip(),
+                "language": result.get("language"),
+                "language_probability": result.get("language_probability"),
+                "confidence": self._calculate_confidence(result),
+                "segments": self._format_segments(result.get("segments", [])),
+                "duration": result.get("duration", 0),
+                "timestamp": self._get_timestamp()
+            }
+
+            return transcription
+
+        except Exception as e:
+            logger.error(f"Error in speech transcription: {e}")
+            return {"error": str(e)}
+
+    def _transcribe_bytes(self, audio_data: AudioInput, filename: str = None) -> Dict:
+        """Decode and transcribe uploaded audio (runs on the worker thread)"""
+        return self._run_model(self._decode_audio(audio_data, filename))
+
+    def _warmup(self):
+        """Decode one second of silence so the first request does not pay for kernel setup"""
+        start = time.perf_counter()
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        try:
+            if self.backend == "faster-whisper":
+                # No VAD here: it would drop the silence before the encoder runs
+                segments, _ = self.model.transcribe(silence, language=self.config.get('language'), beam_size=1)
+                list(segments)
+            else:
+                self.model.transcribe(silence, language=self.config.get('language'),
+                                      fp16=self.model.device.type == "cuda")
+            logger.info(f"Whisper warm-up took {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.warning(f"Whisper warm-up failed: {e}")
+
+    def _run_model(self, audio) -> Dict:
+        """
+        Transcribe a waveform or file path and return a Whisper-style result
+        dict whose segments carry a confidence of exp(avg_logprob)
+        """
+        if self.backend == "faster-whisper":
+            # Greedy decoding for latency; VAD skips silent stretches
+            segments_iter, info = self.model.transcribe(
+                audio,
+                language=self.config.get('language'),
+                task="transcribe",
+                beam_size=1,
+                vad_filter=True
+            )
+            # Segments are produced lazily as decoding proceeds
+            segments = [
+                {
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text,
+                    "confidence": math.exp(segment.avg_logprob)
+                }
+                for segment in segments_iter
+            ]
+            return {
+                "text": "".join(segment["text"] for segment in segments),
+                "language": info.language,
+                "language_probability": info.language_probability,
+                "segments": segments,
+                "duration": info.duration
+            }
+
+        result = self.model.transcribe(
+            audio,
+            language=self.config.get('language'),
+            task="transcribe",
+            fp16=self.model.device.type == "cuda"
+        )
+        for segment in result.get("segments", []):
+            segment["confidence"] = math.exp(segment.get("avg_logprob", float("-inf")))
+        return result
+
+    def _decode_audio(self, audio_data: AudioInput, filename: str = None) -> np.ndarray:
+        """
+        Decode uploaded audio to a 16 kHz mono float32 waveform by piping it
+        through ffmpeg, the same conversion whisper.load_audio does for a path
+        """
+        if self.backend == "faster-whisper":
+            # PyAV decodes from any seekable file object, no ffmpeg binary needed
+            from faster_whisper import decode_audio
+            source = audio_data if hasattr(audio_data, 'read') else BytesIO(audio_data)
+            return decode_audio(source, sampling_rate=SAMPLE_RATE)
+
+        if hasattr(audio_data, 'read'):
+            audio_data = audio_data.read()
+
+        cmd = [
+            "ffmpeg", "-threads", "0", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+        ]
+        try:
+            out = subprocess.run(cmd, input=audio_data, capture_output=True, check=True).stdout
+        except subprocess.CalledProcessError:
+            # Containers that need seeking (e.g. MP4/M4A with a trailing moov
+            # atom) cannot be read from a pipe; decode those from a file
+            import whisper
+
             with tempfile.NamedTemporaryFile(
-                suffix=".wav" if filename and filename.endswith('.wav') else ".mp3",
+                suffix=Path(filename).suffix if filename else ".mp3",
                 delete=False
             ) as temp_file:
                 temp_file.write(audio_data)
                 temp_path = temp_file.name
-
             try:
-                # Transcribe audio
-                result = self.model.transcribe(
-                    temp_path,
-                    language=self.config.get('language'),
-                    task="transcribe"
-                )
-
-                # Extract key information
-                transcription = {
-                    "text": result.get("text", "").strip(),
-                    "language": result.get("language"),
-                    "confidence": self._calculate_confidence(result),
-                    "segments": self._format_segments(result.get("segments", [])),
-                    "duration": result.get("duration", 0),
-                    "timestamp": self._get_timestamp()
-                }
-
-                return transcription
-
+                return whisper.load_audio(temp_path)
             finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+                os.unlink(temp_path)
 
-        except Exception as e:
-            logger.error(f"Error in speech transcription: {e}")
-            return {"error": str(e)}
+        return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
 
     async def transcribe_file(self, file_path: str) -> Dict:
         """Transcribe audio from file path"""
@@ -95,15 +214,12 @@ class STTService:
                 raise FileNotFoundError(f"Audio file not found: {file_path}")
 
             # Transcribe audio
-            result = self.model.transcribe(
-                file_path,
-                language=self.config.get('language'),
-                task="transcribe"
-            )
+            result = await self._run_in_executor(self._run_model, file_path)
 
             transcription = {
                 "text": result.get("text", "").strip(),
                 "language": result.get("language"),
+                "language_probability": result.get("language_probability"),
                 "confidence": self._calculate_confidence(result),
                 "segments": self._format_segments(result.get("segments", [])),
                 "duration": result.get("duration", 0),
@@ -145,7 +261,6 @@ class STTService:
 
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.now().isoformat()
 
     async def health_check(self) -> Dict:
@@ -161,6 +276,7 @@ class STTService:
             return {
                 "status": "healthy",
                 "model": self.config['model'],
+                "backend": self.backend,
                 "language": self.config.get('language')
             }
 
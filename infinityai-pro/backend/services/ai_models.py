@@ -1,10 +1,16 @@
 import asyncio
 import signal
 import sys
+import time
 from datetime import datetime
 from typing import Dict, List, Any
 import logging
+import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
+from utils.logger import get_logger
+
+logger = get_logger("advanced_engine")
 
 # Try to import engine modules, but don't fail if they don't exist
 try:
@@ -28,40 +34,160 @@ except ImportError:
     MarketTick = None
     AdvancedBreakoutStrategy = None
 
-from utils.logger import get_logger
-from data.db import get_user_credentials
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-logger = get_logger("advanced_engine")
+from data.db import get_user_credentials
 
 # =========================================================
 # 2. Feature Engineering
 # =========================================================
+def _features_kernel(close):
+    """
+    One pass over close prices producing SMA_5, SMA_20, EMA_12, EMA_26, MACD
+    and the 14-bar Wilder RSI. Warm-up bars are 0, matching compute_features' fillna.
+    """
+    n = close.shape[0]
+    sma5 = np.zeros(n)
+    sma20 = np.zeros(n)
+    ema12 = np.zeros(n)
+    ema26 = np.zeros(n)
+    rsi = np.zeros(n)
+
+    a12 = 2.0 / 13.0
+    a26 = 2.0 / 27.0
+    sum5 = 0.0
+    sum20 = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+
+    for i in range(n):
+        x = close[i]
+
+        # Rolling sums: add the new bar, drop the one leaving the window
+        sum5 += x
+        sum20 += x
+        if i >= 5:
+            sum5 -= close[i - 5]
+        if i >= 20:
+            sum20 -= close[i - 20]
+        if i >= 4:
+            sma5[i] = sum5 / 5.0
+        if i >= 19:
+            sma20[i] = sum20 / 20.0
+
+        if i == 0:
+            ema12[i] = x
+            ema26[i] = x
+        else:
+            ema12[i] = a12 * x + (1.0 - a12) * ema12[i - 1]
+            ema26[i] = a26 * x + (1.0 - a26) * ema26[i - 1]
+
+            # Wilder smoothing: seed with the first 14 changes, then
+            # avg = (13 * avg + change) / 14
+            d = x - close[i - 1]
+            gain = d if d > 0.0 else 0.0
+            loss = -d if d < 0.0 else 0.0
+            if i <= 14:
+                avg_gain += gain / 14.0
+                avg_loss += loss / 14.0
+            else:
+                avg_gain = (13.0 * avg_gain + gain) / 14.0
+                avg_loss = (13.0 * avg_loss + loss) / 14.0
+            if i >= 14:
+                rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / max(avg_loss, 1e-12))
+
+    return sma5, sma20, ema12, ema26, ema12 - ema26, rsi
+
+
+if NUMBA_AVAILABLE:
+    _features_nb = njit(cache=True, fastmath=True)(_features_kernel)
+
+
+def warmup_features():
+    """
+    Compile (or load from Numba's on-disk cache) the feature kernel, so the
+    first trading call does not pay for it. Called when the bot/engine starts
+    rather than at import, which keeps importing this module cheap.
+    """
+    if NUMBA_AVAILABLE:
+        _features_nb(np.zeros(32))
+
+
+def _wilder_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Vectorized Wilder RSI, 0 for the warm-up bars"""
+    n = close.shape[0]
+    rsi = np.zeros(n)
+    if n <= period:
+        return rsi
+
+    d = np.diff(close, prepend=close[0])
+    gains = np.maximum(d, 0.0)
+    losses = np.maximum(-d, 0.0)
+
+    # Seed with the mean of the first `period` changes, then run the
+    # recurrence avg[i] = avg[i-1] * (period-1)/period + x[i]/period as an IIR filter
+    b, a = [1.0 / period], [1.0, -(period - 1) / period]
+    averages = []
+    for x in (gains, losses):
+        avg = np.empty(n - period)
+        avg[0] = x[1:period + 1].mean()
+        avg[1:] = lfilter(b, a, x[period + 1:], zi=[avg[0] * (period - 1) / period])[0]
+        averages.append(avg)
+
+    rs = averages[0] / np.maximum(averages[1], 1e-12)
+    rsi[period:] = 100.0 - 100.0 / (1.0 + rs)
+    return rsi
+
+
 def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+    close = df["close"].to_numpy(dtype=np.float64)
+    if NUMBA_AVAILABLE and np.isfinite(close).all():
+        sma5, sma20, ema12, ema26, macd, rsi = _features_nb(close)
+        df["SMA_5"] = sma5
+        df["SMA_20"] = sma20
+        df["EMA_12"] = ema12
+        df["EMA_26"] = ema26
+        df["MACD"] = macd
+        df["RSI"] = rsi
+        df.fillna(0, inplace=True)
+        return df
+
     df["SMA_5"] = df["close"].rolling(5).mean()
     df["SMA_20"] = df["close"].rolling(20).mean()
     df["EMA_12"] = df["close"].ewm(span=12, adjust=False).mean()
     df["EMA_26"] = df["close"].ewm(span=26, adjust=False).mean()
     df["MACD"] = df["EMA_12"] - df["EMA_26"]
-    df["RSI"] = 100 - (100 / (1 + df["close"].diff().apply(lambda x: max(x,0)).rolling(14).mean() /
-                                df["close"].diff().apply(lambda x: abs(min(x,0))).rolling(14).mean()))
+    df["RSI"] = _wilder_rsi(close)
     df.fillna(0, inplace=True)
     return df
 
 # =========================================================
 # 3. AI/ML Prediction (Simple Ensemble Example)
 # =========================================================
-def generate_signals(df: pd.DataFrame) -> str:
+def generate_signals_last(macd: float, rsi: float) -> str:
     """
-    Returns: "BUY", "SELL", or "HOLD"
+    Returns: "BUY", "SELL", or "HOLD" from the latest MACD and RSI values
     Simple rule-based + ML placeholder
     """
-    if df["MACD"].iloc[-1] > 0 and df["RSI"].iloc[-1] < 70:
+    if macd > 0 and rsi < 70:
         return "BUY"
-    elif df["MACD"].iloc[-1] < 0 and df["RSI"].iloc[-1] > 30:
+    elif macd < 0 and rsi > 30:
         return "SELL"
     else:
         return "HOLD"
 
+def generate_signals(df: pd.DataFrame) -> str:
+    """
+    Returns: "BUY", "SELL", or "HOLD"
+    Simple rule-based + ML placeholder
+    """
+    # Read the last values straight from the column arrays instead of .iloc
+    return generate_signals_last(float(df["MACD"].to_numpy()[-1]), float(df["RSI"].to_numpy()[-1]))
+
 # =========================================================
 # 4. Options Strategy Generator (Placeholder)
 # =========================================================
@@ -83,36 +209,57 @@ def calculate_position_size(balance: float, risk_pct: float = 0.02) -> int:
 # =========================================================
 # 6. Trading Workflow (Async)
 # =========================================================
-async def trade_pipeline(broker, symbols: List[str], balance: float):
-    from data.instruments import MarketDataFetcher
-    fetcher = MarketDataFetcher()
+# Symbols processed at once; caps the request rate against the data feed and broker
+TRADE_PIPELINE_CONCURRENCY = 4
 
-    for symbol in symbols:
+# Symbols fetched as NSE indices; everything else is an MCX commodity
+INDEX_SYMBOLS = frozenset({"NIFTY", "BANKNIFTY", "SENSEX", "GIFTNIFTY"})
+
+async def _process_symbol(broker, fetcher, symbol: str, balance: float, limiter: asyncio.Semaphore) -> Dict[str, Any]:
+    """Fetch, score and (if signalled) trade one symbol"""
+    async with limiter:
         # 1. Fetch Data
-        if symbol in ["NIFTY", "BANKNIFTY", "SENSEX", "GIFTNIFTY"]:
-            df = await fetcher.fetch_nse_index(symbol)
-        else:
-            df = await fetcher.fetch_mc_commodities(symbol)
+        fetch = fetcher.fetch_nse_index if symbol in INDEX_SYMBOLS else fetcher.fetch_mc_commodities
+        df = await fetch(symbol)
 
         # 2. Compute Features
         df = compute_features(df)
 
         # 3. Generate Signal
         signal = generate_signals(df)
-        print(f"{symbol} Signal: {signal}")
+        logger.info(f"{symbol} Signal: {signal}")
 
         # 4. Generate Options Strategy
         strategy = generate_options_strategy(signal)
-        print(f"{symbol} Options Strategy: {strategy}")
+        logger.info(f"{symbol} Options Strategy: {strategy}")
 
         # 5. Calculate Position Size
         qty = calculate_position_size(balance)
-        print(f"{symbol} Order Qty: {qty}")
+        logger.info(f"{symbol} Order Qty: {qty}")
 
         # 6. Execute Order
+        result = None
         if signal != "HOLD" and qty > 0:
             result = await broker.place_order(symbol, qty, order_type=signal)
-            print(f"{symbol} Order Result: {result}")
+            logger.info(f"{symbol} Order Result: {result}")
+
+        return {"symbol": symbol, "signal": signal, "strategy": strategy, "qty": qty, "order": result}
+
+async def trade_pipeline(broker, symbols: List[str], balance: float):
+    from data.instruments import MarketDataFetcher
+    fetcher = MarketDataFetcher()
+
+    # Symbols are independent, so their fetch/order round trips overlap
+    limiter = asyncio.Semaphore(TRADE_PIPELINE_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_process_symbol(broker, fetcher, symbol, balance, limiter) for symbol in symbols),
+        return_exceptions=True
+    )
+
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, Exception):
+            logger.error(f"Trade pipeline failed for {symbol}: {result}")
+    return results
 
 # =========================================================
 # 7. Run Daily Trading Bot
@@ -122,14 +269,45 @@ async def run_trading_bot():
     broker = BrokerAPI(api_key="YOUR_API_KEY", access_token="YOUR_ACCESS_TOKEN")
     symbols = ["NIFTY", "BANKNIFTY", "SENSEX", "GIFTNIFTY", "MCX_GOLD", "MCX_SILVER"]
     balance = 100000  # Example: 1 Lakh
+    warmup_features()
     await trade_pipeline(broker, symbols, balance)
 
+# Market ticks are queued and handed to strategies in batches
+TICK_QUEUE_MAX_SIZE = 10_000
+TICK_BATCH_MAX_SIZE = 256
+
+# Metrics are logged when they change, at most once per interval
+METRICS_LOG_INTERVAL = 5.0  # seconds
+
+# Per-user risk limits are re-read from the risk manager at most this often
+USER_LIMITS_TTL = 5.0  # seconds
+
 class AdvancedTradingEngine:
     def __init__(self):
         self.running = False
         self.strategies: Dict[str, Any] = {}
         self.user_strategies: Dict[str, List[str]] = {}
         self.shutdown_event = asyncio.Event()
+        self._tick_queue: asyncio.Queue = None
+        self._tick_task = None
+
+        # Column buffers for a tick batch (struct-of-arrays), reused across batches
+        self._symbol_ids: Dict[str, int] = {}
+        self._batch_prices = np.empty(TICK_BATCH_MAX_SIZE, dtype=np.float64)
+        self._batch_symbol_ids = np.empty(TICK_BATCH_MAX_SIZE, dtype=np.int32)
+
+        # Feed name -> status, kept current by feed status events when the feed manager emits them
+        self._feed_status: Dict[str, str] = None
+
+        # Counters updated where ticks, signals and orders are handled
+        self._metrics: Dict[str, Any] = {"ticks": 0, "ticks_dropped": 0, "orders_submitted": 0, "signals": {}}
+        self._metrics_changed = asyncio.Event()
+
+        # Users signals fan out to, and their max position sizes in the same order
+        # (simplified - in production this would be loaded per user)
+        self._user_ids: List[str] = ["LGSU85831L"]  # Example user ID
+        self._max_sizes: np.ndarray = None
+        self._max_sizes_expires_at = 0.0
         
         # Initialize strategies
         self._initialize_strategies()
@@ -158,6 +336,20 @@ class AdvancedTradingEngine:
         self.strategies["advanced_breakout"] = AdvancedBreakoutStrategy(breakout_config)
         logger.info("Initialized advanced breakout strategy")
         
+        # Resolve each strategy's tick entry point once instead of probing per batch
+        self._tick_handlers = self._build_tick_handlers()
+        
+    def _build_tick_handlers(self) -> tuple:
+        """(strategy_name, kind, bound method) per strategy, preferring the batch-capable entry points"""
+        handlers = []
+        for strategy_name, strategy in self.strategies.items():
+            for kind in ('process_batch', 'process_ticks', 'process_tick'):
+                fn = getattr(strategy, kind, None)
+                if fn is not None:
+                    handlers.append((strategy_name, kind, fn))
+                    break
+        return tuple(handlers)
+        
     async def start(self):
         """Start the advanced trading engine"""
         if self.running:
@@ -167,11 +359,19 @@ class AdvancedTradingEngine:
         logger.info("Starting Advanced Trading Engine")
         
         try:
+            # Compile indicator kernels before ticks start arriving
+            warmup_features()
+
             # Start execution engine
             await execution_engine.start(num_workers=5)
             
-            # Setup market data callbacks
+            # Setup market data callbacks; ticks are consumed in batches
+            self._tick_queue = asyncio.Queue(maxsize=TICK_QUEUE_MAX_SIZE)
+            self._tick_task = asyncio.create_task(self._tick_consumer_loop())
             feed_manager.add_callback(self._on_market_tick)
+            if hasattr(feed_manager, 'add_status_callback'):
+                self._feed_status = {}
+                feed_manager.add_status_callback(self._on_feed_status)
             
             # Setup risk management
             await self._setup_risk_management()
@@ -197,6 +397,12 @@ class AdvancedTradingEngine:
         logger.info("Stopping Advanced Trading Engine")
         
         try:
+            # Stop tick consumer
+            if self._tick_task:
+                self._tick_task.cancel()
+                await asyncio.gather(self._tick_task, return_exceptions=True)
+                self._tick_task = None
+
             # Stop execution engine
             await execution_engine.stop()
             
@@ -227,6 +433,7 @@ class AdvancedTradingEngine:
         
         # Apply to all users (in production, this would be per-user)
         risk_manager.set_user_limits("default", default_limits)
+        self._max_sizes = None
         logger.info("Setup risk management with default limits")
         
     async def _setup_market_data_feeds(self):
@@ -249,10 +456,12 @@ class AdvancedTradingEngine:
         # Start the feed
         await feed_manager.start_feed("dhan_feed")
         
-        # Subscribe to symbols
+        # Subscribe to symbols, in one frame where the feed supports it
         symbols = ["RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK"]
-        for symbol in symbols:
-            await feed_manager.subscribe_symbol(symbol, "dhan_feed")
+        if hasattr(feed_manager, 'subscribe_symbols'):
+            await feed_manager.subscribe_symbols(symbols, "dhan_feed")
+        else:
+            await asyncio.gather(*(feed_manager.subscribe_symbol(symbol, "dhan_feed") for symbol in symbols))
             
         logger.info(f"Setup market data feed for {len(symbols)} symbols")
         
@@ -262,8 +471,7 @@ class AdvancedTradingEngine:
         
         # Start background tasks
         tasks = [
-            asyncio.create_task(self._strategy_monitoring_loop()),
-            asyncio.create_task(self._performance_monitoring_loop()),
+            asyncio.create_task(self._metrics_emitter()),
             asyncio.create_task(self._health_check_loop())
         ]
         
@@ -280,48 +488,103 @@ class AdvancedTradingEngine:
             await asyncio.gather(*tasks, return_exceptions=True)
             
     async def _on_market_tick(self, tick: MarketTick):
-        """Handle market tick data"""
+        """Queue market tick data for the batch consumer"""
+        try:
+            self._tick_queue.put_nowait(tick)
+        except asyncio.QueueFull:
+            # Under a sustained burst the oldest tick is the least useful one;
+            # drops are counted and reported by the metrics emitter
+            self._tick_queue.get_nowait()
+            self._tick_queue.put_nowait(tick)
+            self._metrics["ticks_dropped"] += 1
+            self._metrics_changed.set()
+            
+    def _on_feed_status(self, feed_name: str, status):
+        """Record a feed's status change for the health check"""
+        self._feed_status[feed_name] = getattr(status, 'value', status)
+            
+    async def _tick_consumer_loop(self):
+        """Drain queued ticks and process each wake-up's worth as one batch"""
+        while True:
+            batch = [await self._tick_queue.get()]
+            while len(batch) < TICK_BATCH_MAX_SIZE and not self._tick_queue.empty():
+                batch.append(self._tick_queue.get_nowait())
+            await self._process_tick_batch(batch)
+            
+    async def _process_tick_batch(self, ticks: List[MarketTick]):
+        """Handle a batch of market ticks"""
         try:
-            # Update position manager with latest prices
-            await position_manager.update_market_price(tick.symbol, tick.price)
+            # Only the latest price per symbol matters to the position manager
+            latest = {tick.symbol: tick.price for tick in ticks}
+            self._metrics["ticks"] += len(ticks)
+            self._metrics_changed.set()
+            for symbol, price in latest.items():
+                await position_manager.update_market_price(symbol, price)
             
-            # Process tick through strategies
-            for strategy_name, strategy in self.strategies.items():
-                if hasattr(strategy, 'process_tick'):
-                    signal = await strategy.process_tick(tick)
+            # Columnar copy of the batch for strategies that work on arrays
+            n = len(ticks)
+            prices = self._batch_prices[:n]
+            symbol_ids = self._batch_symbol_ids[:n]
+            ids = self._symbol_ids
+            for i, tick in enumerate(ticks):
+                prices[i] = tick.price
+                symbol_ids[i] = ids.setdefault(tick.symbol, len(ids))
+            
+            # Process ticks through strategies, whole batch at once where supported
+            for strategy_name, kind, fn in self._tick_handlers:
+                if kind == 'process_batch':
+                    # Views into reused buffers: only valid for the duration of the call
+                    signals = await fn(prices, symbol_ids, self._symbol_ids) or []
+                elif kind == 'process_ticks':
+                    signals = await fn(ticks) or []
+                else:
+                    signals = [await fn(tick) for tick in ticks]
                     
+                for signal in signals:
                     if signal:
+                        strategy_signals = self._metrics["signals"]
+                        strategy_signals[strategy_name] = strategy_signals.get(strategy_name, 0) + 1
                         await self._handle_strategy_signal(strategy_name, signal)
                         
         except Exception as e:
-            logger.error(f"Error processing market tick for {tick.symbol}: {e}")
+            logger.error(f"Error processing batch of {len(ticks)} market ticks: {e}")
             
     async def _handle_strategy_signal(self, strategy_name: str, signal):
         """Handle signal from strategy"""
         try:
             logger.info(f"Processing signal from {strategy_name}: {signal.symbol} {signal.direction}")
             
-            # Get users for this strategy (simplified - in production this would be more sophisticated)
-            users = ["LGSU85831L"]  # Example user ID
+            # Calculate position sizes for all users at once based on risk management
+            position_sizes = self._calculate_position_sizes(signal)
             
-            for user_id in users:
+            for user_id, position_size in zip(self._user_ids, position_sizes.tolist()):
                 # Check if user has this strategy enabled
                 if self._is_strategy_enabled_for_user(user_id, strategy_name):
-                    # Calculate position size based on risk management
-                    position_size = await self._calculate_position_size(user_id, signal)
-                    
                     if position_size > 0:
                         # Create orders
                         strategy = self.strategies[strategy_name]
                         orders = await strategy.create_orders(signal, user_id, position_size)
                         
-                        # Submit orders
-                        for order in orders:
+                        # Submit orders: one batched call where the engine supports it,
+                        # otherwise concurrently rather than one round trip after another
+                        if hasattr(execution_engine, 'submit_orders'):
                             try:
-                                await execution_engine.submit_order(order)
-                                logger.info(f"Submitted order {order.id} for {user_id}")
+                                await execution_engine.submit_orders(orders)
+                                self._metrics["orders_submitted"] += len(orders)
+                                logger.info(f"Submitted {len(orders)} orders for {user_id}")
                             except Exception as e:
-                                logger.error(f"Failed to submit order: {e}")
+                                logger.error(f"Failed to submit orders: {e}")
+                        else:
+                            results = await asyncio.gather(
+                                *(execution_engine.submit_order(order) for order in orders),
+                                return_exceptions=True
+                            )
+                            for order, result in zip(orders, results):
+                                if isinstance(result, Exception):
+                                    logger.error(f"Failed to submit order: {result}")
+                                else:
+                                    self._metrics["orders_submitted"] += 1
+                                    logger.info(f"Submitted order {order.id} for {user_id}")
                                 
         except Exception as e:
             logger.error(f"Error handling strategy signal: {e}")
@@ -331,75 +594,77 @@ class AdvancedTradingEngine:
         # In production, this would check user preferences/database
         return True
         
-    async def _calculate_position_size(self, user_id: str, signal) -> int:
-        """Calculate position size based on risk management"""
+    def _user_max_sizes(self) -> np.ndarray:
+        """Max position size per user, re-read from the risk manager at most every USER_LIMITS_TTL"""
+        now = time.monotonic()
+        if self._max_sizes is None or now >= self._max_sizes_expires_at:
+            self._max_sizes = np.array(
+                [risk_manager.get_user_limits(user_id).max_position_size for user_id in self._user_ids],
+                dtype=np.int64
+            )
+            self._max_sizes_expires_at = now + USER_LIMITS_TTL
+        return self._max_sizes
+        
+    def _calculate_position_sizes(self, signal) -> np.ndarray:
+        """Position size for every user in _user_ids, in one vector operation"""
         try:
-            # Get user's current positions
-            positions = position_manager.get_user_positions(user_id)
-            
-            # Get risk limits
-            limits = risk_manager.get_user_limits(user_id)
-            
             # Simple position sizing based on confidence and risk limits
             base_size = 100  # Base position size
             confidence_multiplier = signal.confidence
             
             position_size = int(base_size * confidence_multiplier)
             
-            # Apply risk limits
-            position_size = min(position_size, limits.max_position_size)
-            
-            return position_size
+            # Apply each user's risk limit
+            return np.minimum(position_size, self._user_max_sizes())
             
         except Exception as e:
             logger.error(f"Error calculating position size: {e}")
-            return 0
+            return np.zeros(len(self._user_ids), dtype=np.int64)
             
-    async def _strategy_monitoring_loop(self):
-        """Monitor strategy performance"""
+    async def _metrics_emitter(self):
+        """Log signal/order/tick counters when they change, debounced to METRICS_LOG_INTERVAL"""
+        dropped_reported = 0
         while self.running:
             try:
-                # Monitor strategy signals and performance
-                for strategy_name, strategy in self.strategies.items():
-                    if hasattr(strategy, 'get_active_signals'):
-                        active_signals = strategy.get_active_signals()
-                        if active_signals:
-                            logger.info(f"{strategy_name} has {len(active_signals)} active signals")
-                            
-                await asyncio.sleep(30)  # Check every 30 seconds
-                
-            except Exception as e:
-                logger.error(f"Error in strategy monitoring loop: {e}")
-                await asyncio.sleep(60)
-                
-    async def _performance_monitoring_loop(self):
-        """Monitor overall performance"""
-        while self.running:
-            try:
-                # Log performance metrics
-                total_orders = len(order_manager.orders)
-                active_positions = sum(
-                    len(position_manager.get_user_positions(user_id))
-                    for user_id in position_manager.user_positions.keys()
+                await self._metrics_changed.wait()
+                self._metrics_changed.clear()
+
+                metrics = self._metrics
+                dropped = metrics["ticks_dropped"] - dropped_reported
+                if dropped:
+                    logger.warning(
+                        f"Tick queue full: dropped {dropped} ticks "
+                        f"({self._tick_queue.qsize()}/{TICK_QUEUE_MAX_SIZE} queued)"
+                    )
+                    dropped_reported = metrics["ticks_dropped"]
+                for strategy_name, count in metrics["signals"].items():
+                    logger.info(f"{strategy_name} has produced {count} signals")
+                logger.info(
+                    f"Performance: {metrics['ticks']} ticks, {metrics['orders_submitted']} orders submitted, "
+                    f"{len(order_manager.orders)} total orders"
                 )
-                
-                logger.info(f"Performance: {total_orders} total orders, {active_positions} active positions")
-                
-                await asyncio.sleep(60)  # Check every minute
-                
+
+                await asyncio.sleep(METRICS_LOG_INTERVAL)
+
             except Exception as e:
-                logger.error(f"Error in performance monitoring loop: {e}")
-                await asyncio.sleep(120)
+                logger.error(f"Error in metrics emitter: {e}")
+                await asyncio.sleep(METRICS_LOG_INTERVAL)
                 
     async def _health_check_loop(self):
         """Health check loop"""
         while self.running:
             try:
                 # Check system health
-                feed_status = {name: feed.status.value for name, feed in feed_manager.feeds.items()}
+                feed_status = self._feed_status
+                if feed_status is None:
+                    feed_status = {name: feed.status.value for name, feed in feed_manager.feeds.items()}
                 execution_status = "RUNNING" if execution_engine.running else "STOPPED"
                 
-                logger.info(f"Health: Execution={execution_status}, Feeds={feed_status}")
+                logger.info(
+                    f"Health: Execution={execution_status}, Feeds={feed_status}, "
+                    f"TickQueue={self._tick_queue.qsize()}/{TICK_QUEUE_MAX_SIZE}, "
+                    f"TicksDropped={self._metrics['ticks_dropped']}"
+                )
                 
                 await asyncio.sleep(120)  # Check every 2 minutes
                 
@@ -450,25 +715,11 @@ class TechnicalAnalysisAI:
     async def analyze_price_data(self, price_data: pd.DataFrame, symbol: str) -> Dict:
         """Analyze price data for technical indicators"""
         try:
-            # Simple technical analysis
-            latest_close = price_data['close'].iloc[-1] if 'close' in price_data.columns else 0
-            sma_20 = price_data['close'].rolling(20).mean().iloc[-1] if 'close' in price_data.columns else 0
+            if 'close' not in price_data.columns:
+                return self._price_analysis(symbol, "HOLD", 0, 0)
 
-            signal = "HOLD"
-            if latest_close > sma_20:
-                signal = "BUY"
-            elif latest_close < sma_20:
-                signal = "SELL"
-
-            return {
-                "symbol": symbol,
-                "signal": signal,
-                "indicators": {
-                    "sma_20": sma_20,
-                    "latest_close": latest_close
-                },
-                "analysis": f"Simple SMA crossover analysis for {symbol}"
-            }
+            closes = price_data['close'].to_numpy(dtype=np.float64)
+            return (await self.analyze_price_data_batch(closes[np.newaxis, :], [symbol]))[0]
         except Exception as e:
             return {
                 "symbol": symbol,
@@ -476,6 +727,35 @@ class TechnicalAnalysisAI:
                 "signal": "HOLD"
             }
 
+    async def analyze_price_data_batch(self, close_matrix: np.ndarray, symbols: List[str]) -> List[Dict]:
+        """
+        SMA-20 crossover analysis for many symbols at once. close_matrix is
+        (symbols, bars) with the latest close in the last column.
+        """
+        latest_close = close_matrix[:, -1]
+        # Only the last window is needed, so average the tail instead of a full rolling Series
+        if close_matrix.shape[1] >= 20:
+            sma_20 = close_matrix[:, -20:].mean(axis=1)
+        else:
+            sma_20 = np.full(close_matrix.shape[0], np.nan)
+
+        signals = np.where(latest_close > sma_20, "BUY", np.where(latest_close < sma_20, "SELL", "HOLD"))
+        return [
+            self._price_analysis(symbol, str(signal), sma, close)
+            for symbol, signal, sma, close in zip(symbols, signals, sma_20, latest_close)
+        ]
+
+    def _price_analysis(self, symbol: str, signal: str, sma_20, latest_close) -> Dict:
+        return {
+            "symbol": symbol,
+            "signal": signal,
+            "indicators": {
+                "sma_20": sma_20,
+                "latest_close": latest_close
+            },
+            "analysis": f"Simple SMA crossover analysis for {symbol}"
+        }
+
     async def health_check(self) -> Dict:
         """Health check for technical analysis service"""
         return {
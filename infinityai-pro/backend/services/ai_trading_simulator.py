@@ -10,9 +10,9 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-import pickle
+import joblib
 import os
-import json
+import orjson
 from collections import deque
 
 from services.market_data_ai import MarketDataAI
@@ -22,6 +22,20 @@ from utils.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Experience replay capacity and how many recent experiences train_rl_model fits on
+MEMORY_SIZE = 10000
+RL_TRAIN_WINDOW = 1000
+
+# Intraday downloads in flight at once per simulated day
+INTRADAY_FETCH_CONCURRENCY = 8
+
+# Simulated days between rewrites of the performance JSON rollup
+PERFORMANCE_ROLLUP_INTERVAL = 10
+
+# Columns get_state reads from the latest bar
+STATE_COLUMNS = ('MACD', 'RSI', 'SMA_5', 'SMA_20', 'EMA_12', 'EMA_26', 'ATR', 'VWAP',
+                 'close', 'high', 'low', 'volume')
+
 class AITradingSimulator:
     """
     Advanced AI trading simulator that:
@@ -40,22 +54,40 @@ class AITradingSimulator:
         # RL components
         self.state_size = 15  # Technical indicators + market data
         self.action_size = 3  # BUY, SELL, HOLD
-        self.memory = deque(maxlen=10000)
+        # Experience replay ring buffer, one preallocated array per field
+        self._states = np.zeros((MEMORY_SIZE, self.state_size), dtype=np.float32)
+        self._actions = np.zeros(MEMORY_SIZE, dtype=np.int8)
+        self._rewards = np.zeros(MEMORY_SIZE, dtype=np.float32)
+        self._next_states = np.zeros_like(self._states)
+        self._dones = np.zeros(MEMORY_SIZE, dtype=bool)
+        self._head = 0
+        self._size = 0
         self.gamma = 0.95  # Discount factor
         self.epsilon = 1.0  # Exploration rate
         self.epsilon_min = 0.01
         self.epsilon_decay = 0.995
         self.learning_rate = 0.001
+        self._rng = np.random.default_rng()
 
         # Performance tracking
         self.episode_rewards = []
         self.portfolio_values = []
         self.win_rate_history = []
         self.sharpe_ratio_history = []
+        # Running daily-return mean/M2 (Welford) and the last 10 episode outcomes
+        self._ret_n = 0
+        self._ret_mean = 0.0
+        self._ret_m2 = 0.0
+        self._recent_wins = deque(maxlen=10)
+
+        # Last featurized frame per symbol, keyed by (last bar timestamp, bar count, last bar values)
+        self._feat_cache: Dict[str, Tuple[Tuple[Any, int, Tuple], pd.DataFrame]] = {}
 
         # Model paths
         self.rl_model_path = os.path.join(os.path.dirname(self.config.MODEL_PATH), 'rl_trading_model.pkl')
         self.performance_log_path = os.path.join(os.path.dirname(self.config.TRADE_LOG_CSV), 'simulation_performance.json')
+        # One JSON line per simulated day, appended; the .json above is the periodic rollup
+        self.performance_history_path = os.path.splitext(self.performance_log_path)[0] + '.jsonl'
 
         # Ensure directories exist
         model_dir = os.path.dirname(self.config.MODEL_PATH)
@@ -93,8 +125,9 @@ class AITradingSimulator:
     def get_state(self, symbol: str, df: pd.DataFrame) -> np.ndarray:
         """Extract state representation from market data"""
         try:
-            # Get latest data point
-            latest = df.iloc[-1]
+            # Latest value of each column, read straight from the column arrays
+            columns = df.columns
+            latest = {c: df[c].to_numpy()[-1] for c in STATE_COLUMNS if c in columns}
 
             # Technical indicators
             macd = latest.get('MACD', 0)
@@ -113,11 +146,17 @@ class AITradingSimulator:
             volume = latest.get('volume', 1000)
 
             # Returns
-            ret_1d = df['close'].pct_change().iloc[-1] if len(df) > 1 else 0
-            ret_5d = df['close'].pct_change(5).iloc[-1] if len(df) > 5 else 0
-
-            # Volatility
-            vol_20d = df['close'].pct_change().rolling(20).std().iloc[-1] if len(df) > 20 else 0.02
+            closes = df['close'].to_numpy(dtype=np.float64)
+            n = len(closes)
+            ret_1d = closes[-1] / closes[-2] - 1 if n > 1 else 0
+            ret_5d = closes[-1] / closes[-6] - 1 if n > 5 else 0
+
+            # Volatility: sample std of the last 20 one-bar returns
+            if n > 20:
+                tail = closes[-21:]
+                vol_20d = np.std(np.diff(tail) / tail[:-1], ddof=1)
+            else:
+                vol_20d = 0.02
 
             state = np.array([
                 macd, rsi, sma_5, sma_20, ema_12, ema_26,
@@ -125,14 +164,15 @@ class AITradingSimulator:
                 ret_1d, ret_5d, vol_20d
             ])
 
-            # Normalize state
+            # Normalize state (in float64; the normalized values are stored as float32
+            # to match the replay buffer and halve what training reads)
             state = (state - np.mean(state)) / (np.std(state) + 1e-8)
 
-            return state
+            return state.astype(np.float32)
 
         except Exception as e:
-            logger.error(f"Error getting state for {symbol}: {e}")
-            return np.zeros(self.state_size)
+            logger.error("Error getting state for %s: %s", symbol, e)
+            return np.zeros(self.state_size, dtype=np.float32)
 
     def choose_action(self, state: np.ndarray) -> int:
         """Choose action using epsilon-greedy policy"""
@@ -150,31 +190,86 @@ class AITradingSimulator:
                         pred = self.rl_model.predict(state_reshaped)[0]
                         return int(pred)
                 except Exception as e:
-                    logger.warning(f"RL model prediction failed: {e}")
+                    logger.warning("RL model prediction failed: %s", e)
 
             return np.random.choice(self.action_size)  # Fallback to random
 
     def remember(self, state: np.ndarray, action: int, reward: float, next_state: np.ndarray, done: bool):
         """Store experience in memory"""
-        self.memory.append((state, action, reward, next_state, done))
+        i = self._head
+        self._states[i] = state
+        self._actions[i] = action
+        self._rewards[i] = reward
+        self._next_states[i] = next_state
+        self._dones[i] = done
+        self._head = (i + 1) % MEMORY_SIZE
+        self._size = min(self._size + 1, MEMORY_SIZE)
+
+    def remember_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                       next_states: np.ndarray, dones: np.ndarray):
+        """Store a batch of experiences in memory, oldest first"""
+        n = len(actions)
+        if n > MEMORY_SIZE:
+            states, actions, rewards, next_states, dones = (
+                a[-MEMORY_SIZE:] for a in (states, actions, rewards, next_states, dones))
+            n = MEMORY_SIZE
+        idx = (self._head + np.arange(n)) % MEMORY_SIZE
+        self._states[idx] = states
+        self._actions[idx] = actions
+        self._rewards[idx] = rewards
+        self._next_states[idx] = next_states
+        self._dones[idx] = dones
+        self._head = (self._head + n) % MEMORY_SIZE
+        self._size = min(self._size + n, MEMORY_SIZE)
+
+    def _recent(self, n: int) -> np.ndarray:
+        """Ring-buffer indices of the last n experiences, oldest first"""
+        n = min(n, self._size)
+        if self._size < MEMORY_SIZE:
+            return np.arange(self._size - n, self._size)
+        return (self._head - n + np.arange(n)) % MEMORY_SIZE
 
     def calculate_reward(self, action: int, pnl: float, market_return: float) -> float:
         """Calculate reward based on trading performance"""
-        base_reward = pnl * 100  # Scale PnL
+        return float(self.calculate_rewards(np.array([action]), np.array([pnl]), np.array([market_return]))[0])
+
+    def calculate_rewards(self, actions: np.ndarray, pnl: np.ndarray, market_returns: np.ndarray) -> np.ndarray:
+        """Calculate rewards for a batch of trades in one pass"""
+        rewards = pnl * 100  # Scale PnL
 
         # Bonus for beating market
-        if pnl > market_return:
-            base_reward += 10
+        rewards = rewards + 10 * (pnl > market_returns)
 
         # Penalty for wrong direction vs market
-        if (action == 0 and market_return < 0) or (action == 1 and market_return > 0):
-            base_reward -= 5
+        rewards -= 5 * (((actions == 0) & (market_returns < 0)) | ((actions == 1) & (market_returns > 0)))
 
         # Penalty for holding during volatile periods
-        if action == 2 and abs(market_return) > 0.02:  # 2% daily move
-            base_reward -= 2
+        rewards -= 2 * ((actions == 2) & (np.abs(market_returns) > 0.02))  # 2% daily move
 
-        return base_reward
+        return rewards
+
+    def _featurize_cached(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """featurize() the symbol's bars, reusing the previous result until the bars change"""
+        # The last bar's values are part of the key: while it is still forming, its
+        # close/high/low/volume move although the timestamp and length do not
+        key = (df.index[-1], len(df), tuple(df.to_numpy()[-1].tolist()))
+        cached = self._feat_cache.get(symbol)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        df_feat = featurize(df.reset_index())
+        self._feat_cache[symbol] = (key, df_feat)
+        return df_feat
+
+    async def _fetch_intraday(self, symbols: List[str]) -> List[Any]:
+        """Download 5min bars for all symbols, at most INTRADAY_FETCH_CONCURRENCY at a time"""
+        sem = asyncio.Semaphore(INTRADAY_FETCH_CONCURRENCY)
+
+        async def fetch(symbol: str):
+            async with sem:
+                return await self.market_data.get_intraday_data(symbol, "5min")
+
+        return await asyncio.gather(*(fetch(s) for s in symbols), return_exceptions=True)
 
     async def simulate_trading_day(self, symbols: List[str] = None) -> Dict[str, Any]:
         """Run one day of AI-powered trading simulation"""
@@ -184,25 +279,41 @@ class AITradingSimulator:
         total_pnl = 0
         trades_executed = 0
         episode_reward = 0
+        # Executed trades, rewarded and remembered together once every symbol has run
+        trade_states, trade_actions, trade_pnl_pcts, trade_market_returns, trade_next_states = [], [], [], [], []
+
+        logger.info("🤖 Starting AI trading simulation for %d symbols", len(symbols))
+
+        # Fetch every symbol's bars concurrently, then simulate them in order
+        frames = await self._fetch_intraday(symbols)
+
+        # Trade outcomes for the day, one draw per symbol: win/loss sign and size as a fraction of cost
+        outcome_signs = self._rng.choice([1, -1], size=len(symbols), p=[0.55, 0.45])
+        outcome_sizes = self._rng.uniform(0.2, 1.5, size=len(symbols))
 
-        logger.info(f"🤖 Starting AI trading simulation for {len(symbols)} symbols")
+        # Loop-invariant lookups, bound once
+        bot = self.paper_bot
+        risk_pct = self.config.RISK_PER_TRADE_PCT
+        position_cap = 0.3  # max share of equity one trade may cost
+        get_state = self.get_state
+        choose_action = self.choose_action
 
-        for symbol in symbols:
+        for i, (symbol, df) in enumerate(zip(symbols, frames)):
             try:
-                # Fetch real-time data
-                df = await self.market_data.get_intraday_data(symbol, "5min")
+                if isinstance(df, Exception):
+                    raise df
                 if df is None or len(df) < 50:
-                    logger.warning(f"Insufficient data for {symbol}")
+                    logger.warning("Insufficient data for %s", symbol)
                     continue
 
                 # Featurize data
-                df_feat = featurize(df.reset_index())
+                df_feat = self._featurize_cached(symbol, df)
 
                 # Get current state
-                state = self.get_state(symbol, df_feat)
+                state = get_state(symbol, df_feat)
 
                 # Choose action
-                action = self.choose_action(state)
+                action = choose_action(state)
 
                 # Execute trade simulation
                 if action == 0:  # BUY
@@ -214,56 +325,74 @@ class AITradingSimulator:
 
                 # Simulate trade using paper bot logic
                 if signal != "HOLD":
+                    closes = df_feat['close'].to_numpy()
+
                     # Get premium estimate
-                    premium = max(10.0, df_feat.iloc[-1]['close'] * 0.0006)
+                    premium = max(10.0, closes[-1] * 0.0006)
 
                     # Position sizing
-                    risk_amount = self.paper_bot.equity * self.config.RISK_PER_TRADE_PCT
+                    risk_amount = bot.equity * risk_pct
                     stop_loss_amount = premium * 0.6
                     contracts = int(max(1, risk_amount / (stop_loss_amount + 1e-9)))
 
                     cost = contracts * premium
-                    if cost <= self.paper_bot.equity * 0.3:
+                    if cost <= bot.equity * position_cap:
                         # Simulate trade outcome
-                        market_return = df_feat['close'].pct_change().iloc[-1] if len(df_feat) > 1 else 0
-                        pnl = np.random.choice([1, -1], p=[0.55, 0.45]) * cost * np.random.uniform(0.2, 1.5)
+                        market_return = closes[-1] / closes[-2] - 1 if len(closes) > 1 else 0
+                        pnl = outcome_signs[i] * cost * outcome_sizes[i]
 
                         # Update paper bot equity
-                        self.paper_bot.equity = self.paper_bot.equity - cost + cost + pnl
+                        bot.equity = bot.equity - cost + cost + pnl
 
                         total_pnl += pnl
                         trades_executed += 1
 
-                        # Calculate reward
-                        reward = self.calculate_reward(action, pnl/cost, market_return)
-                        episode_reward += reward
-
                         # Get next state for learning
-                        next_state = self.get_state(symbol, df_feat)
+                        next_state = get_state(symbol, df_feat)
 
-                        # Store experience
-                        self.remember(state, action, reward, next_state, False)
+                        trade_states.append(state)
+                        trade_actions.append(action)
+                        trade_pnl_pcts.append(pnl / cost)
+                        trade_market_returns.append(market_return)
+                        trade_next_states.append(next_state)
 
-                        logger.info(f"💰 {signal} {symbol}: Contracts={contracts}, Premium=₹{premium:.2f}, "
-                                   f"Cost=₹{cost:.2f}, PnL=₹{pnl:.2f}, Equity=₹{self.paper_bot.equity:.2f}")
+                        logger.info("💰 %s %s: Contracts=%d, Premium=₹%.2f, Cost=₹%.2f, PnL=₹%.2f, Equity=₹%.2f",
+                                    signal, symbol, contracts, premium, cost, pnl, bot.equity)
             except Exception as e:
-                logger.error(f"Error simulating {symbol}: {e}")
+                logger.error("Error simulating %s: %s", symbol, e)
                 continue
 
+        # Calculate rewards and store experiences for the day's trades
+        if trade_actions:
+            rewards = self.calculate_rewards(
+                np.array(trade_actions), np.array(trade_pnl_pcts, dtype=np.float64),
+                np.array(trade_market_returns, dtype=np.float64)
+            )
+            episode_reward = float(rewards.sum())
+            self.remember_batch(np.array(trade_states), np.array(trade_actions), rewards,
+                                np.array(trade_next_states), np.zeros(len(rewards), dtype=bool))
+
         # Update performance metrics
+        if self.portfolio_values and self.portfolio_values[-1]:
+            ret = self.paper_bot.equity / self.portfolio_values[-1] - 1
+            self._ret_n += 1
+            delta = ret - self._ret_mean
+            self._ret_mean += delta / self._ret_n
+            self._ret_m2 += delta * (ret - self._ret_mean)
         self.portfolio_values.append(self.paper_bot.equity)
         self.episode_rewards.append(episode_reward)
+        self._recent_wins.append(episode_reward > 0)
 
         # Calculate win rate (simplified)
         if trades_executed > 0:
-            win_rate = len([r for r in self.episode_rewards[-10:] if r > 0]) / min(10, len(self.episode_rewards))
+            win_rate = sum(self._recent_wins) / len(self._recent_wins)
             self.win_rate_history.append(win_rate)
 
         # Calculate Sharpe ratio (simplified)
-        if len(self.portfolio_values) > 10:
-            returns = pd.Series(self.portfolio_values).pct_change().dropna()
-            if len(returns) > 0 and returns.std() > 0:
-                sharpe = returns.mean() / returns.std() * np.sqrt(252)  # Annualized
+        if len(self.portfolio_values) > 10 and self._ret_n > 1:
+            ret_std = np.sqrt(self._ret_m2 / (self._ret_n - 1))
+            if ret_std > 0:
+                sharpe = self._ret_mean / ret_std * np.sqrt(252)  # Annualized
                 self.sharpe_ratio_history.append(sharpe)
 
         # Decay exploration rate
@@ -283,50 +412,27 @@ class AITradingSimulator:
             "sharpe_ratio": self.sharpe_ratio_history[-1] if self.sharpe_ratio_history else 0
         }
 
-        logger.info(f"📊 Simulation complete: PnL: ₹{total_pnl:.2f}, Equity: ₹{self.paper_bot.equity:.2f}, Trades: {trades_executed}")
+        logger.info("📊 Simulation complete: PnL: ₹%.2f, Equity: ₹%.2f, Trades: %d",
+                    total_pnl, self.paper_bot.equity, trades_executed)
         return result
 
     def train_rl_model(self, batch_size: int = 32):
         """Train RL model on accumulated experiences"""
-        if len(self.memory) < batch_size:
+        if self._size < batch_size:
             return
 
-        # Sample batch from memory
-        batch = np.random.choice(len(self.memory), batch_size, replace=False)
-        states, actions, rewards, next_states, dones = [], [], [], [], []
-
-        for idx in batch:
-            state, action, reward, next_state, done = self.memory[idx]
-            states.append(state)
-            actions.append(action)
-            rewards.append(reward)
-            next_states.append(next_state)
-            dones.append(done)
-
-        states = np.array(states)
-        next_states = np.array(next_states)
-
-        # Simple Q-learning update (simplified RL)
-        # In a real implementation, you'd use a proper RL framework like Stable Baselines
-
-        # For now, we'll use the existing ML training approach
-        # Convert experiences to supervised learning format
-        X = states
-        y = actions  # Simplified: predict best action
-
-        # Add some noise to prevent overfitting
-        y = y + np.random.normal(0, 0.1, size=y.shape)
-
-        # Train/update model
+        # Simple supervised stand-in for a Q-learning update: fit the policy
+        # model on the most recent experiences
         try:
             if not hasattr(self, 'rl_model') or self.rl_model is None:
-                # Initialize simple model
-                from sklearn.ensemble import RandomForestClassifier
-                self.rl_model = RandomForestClassifier(n_estimators=100, random_state=42)
+                # Histogram GBM: single-row predict_proba is far cheaper than a 100-tree forest
+                from sklearn.ensemble import HistGradientBoostingClassifier
+                self.rl_model = HistGradientBoostingClassifier(max_iter=100, max_depth=6, random_state=42)
 
             # Fit on recent experiences
-            recent_states = np.array([exp[0] for exp in list(self.memory)[-1000:]])
-            recent_actions = np.array([exp[1] for exp in list(self.memory)[-1000:]])
+            recent = self._recent(RL_TRAIN_WINDOW)
+            recent_states = self._states[recent]
+            recent_actions = self._actions[recent]
 
             if len(recent_states) >= 10:
                 self.rl_model.fit(recent_states, recent_actions)
@@ -335,11 +441,11 @@ class AITradingSimulator:
                 logger.info("🧠 RL model updated with recent experiences")
 
         except Exception as e:
-            logger.error(f"Error training RL model: {e}")
+            logger.error("Error training RL model: %s", e)
 
     async def run_continuous_simulation(self, days: int = 30, train_interval: int = 5):
         """Run continuous simulation with periodic training"""
-        logger.info(f"🚀 Starting continuous AI trading simulation for {days} days")
+        logger.info("🚀 Starting continuous AI trading simulation for %d days", days)
 
         for day in range(days):
             try:
@@ -349,7 +455,7 @@ class AITradingSimulator:
                 # Train model periodically
                 if (day + 1) % train_interval == 0:
                     self.train_rl_model()
-                    logger.info(f"📈 Model training completed (Day {day + 1})")
+                    logger.info("📈 Model training completed (Day %d)", day + 1)
 
                 # Log progress
                 if (day + 1) % 10 == 0:
@@ -359,9 +465,10 @@ class AITradingSimulator:
                 await asyncio.sleep(1)
 
             except Exception as e:
-                logger.error(f"Error in simulation day {day + 1}: {e}")
+                logger.error("Error in simulation day %d: %s", day + 1, e)
                 continue
 
+        self.save_performance_rollup()
         logger.info("🎯 Continuous simulation completed!")
         return self.get_performance_summary()
 
@@ -374,8 +481,8 @@ class AITradingSimulator:
         avg_reward = np.mean(recent_rewards)
         win_rate = np.mean(self.win_rate_history[-10:]) if self.win_rate_history else 0
 
-        logger.info(f"📊 Day {day}: Avg Reward: {avg_reward:.2f}, Win Rate: {win_rate:.2%}, "
-                   f"Equity: ₹{self.paper_bot.equity:.2f}, Epsilon: {self.epsilon:.3f}")
+        logger.info("📊 Day %d: Avg Reward: %.2f, Win Rate: %.2f%%, Equity: ₹%.2f, Epsilon: %.3f",
+                    day, avg_reward, win_rate * 100, self.paper_bot.equity, self.epsilon)
 
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get comprehensive performance summary"""
@@ -402,28 +509,51 @@ class AITradingSimulator:
     def save_rl_model(self):
         """Save RL model to disk"""
         try:
-            with open(self.rl_model_path, 'wb') as f:
-                pickle.dump(self.rl_model, f)
-            logger.info(f"💾 RL model saved to {self.rl_model_path}")
+            # Write beside the old file and swap it in, so a memory-mapped copy
+            # of the previous model is never truncated underneath its reader
+            tmp_path = self.rl_model_path + '.tmp'
+            joblib.dump(self.rl_model, tmp_path)
+            os.replace(tmp_path, self.rl_model_path)
+            logger.info("💾 RL model saved to %s", self.rl_model_path)
         except Exception as e:
-            logger.error(f"Error saving RL model: {e}")
+            logger.error("Error saving RL model: %s", e)
 
     def load_rl_model(self):
         """Load RL model from disk"""
         try:
             if os.path.exists(self.rl_model_path):
-                with open(self.rl_model_path, 'rb') as f:
-                    self.rl_model = pickle.load(f)
-                logger.info(f"📂 RL model loaded from {self.rl_model_path}")
+                # Uncompressed dump: tree arrays are memory-mapped instead of copied onto the heap
+                self.rl_model = joblib.load(self.rl_model_path, mmap_mode='r')
+                logger.info("📂 RL model loaded from %s", self.rl_model_path)
             else:
                 self.rl_model = None
                 logger.info("📝 No existing RL model found, starting fresh")
         except Exception as e:
-            logger.error(f"Error loading RL model: {e}")
+            logger.error("Error loading RL model: %s", e)
             self.rl_model = None
 
     def save_performance_data(self):
-        """Save performance metrics to JSON"""
+        """Append the day's metrics to the JSONL log and refresh the JSON rollup every few days"""
+        try:
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                "day": len(self.portfolio_values),
+                "equity": self.paper_bot.equity if self.paper_bot else 0,
+                "episode_reward": self.episode_rewards[-1] if self.episode_rewards else 0,
+                "win_rate": self.win_rate_history[-1] if self.win_rate_history else None,
+                "sharpe_ratio": self.sharpe_ratio_history[-1] if self.sharpe_ratio_history else None
+            }
+            with open(self.performance_history_path, 'ab') as f:
+                f.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
+
+            if len(self.portfolio_values) % PERFORMANCE_ROLLUP_INTERVAL == 0:
+                self.save_performance_rollup()
+
+        except Exception as e:
+            logger.error("Error saving performance data: %s", e)
+
+    def save_performance_rollup(self):
+        """Save recent performance metrics to JSON"""
         try:
             data = {
                 "timestamp": datetime.now().isoformat(),
@@ -434,11 +564,11 @@ class AITradingSimulator:
                 "current_equity": self.paper_bot.equity if self.paper_bot else 0
             }
 
-            with open(self.performance_log_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(self.performance_log_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
         except Exception as e:
-            logger.error(f"Error saving performance data: {e}")
+            logger.error("Error saving performance data: %s", e)
 
     async def get_realtime_quote(self, symbol: str) -> Dict:
         """Get real-time quote for monitoring"""
@@ -455,7 +585,7 @@ class AITradingSimulator:
             "market_data": self.market_data.health_check() if self.market_data else {"status": "not_initialized"},
             "paper_bot_equity": self.paper_bot.equity if self.paper_bot else 0,
             "rl_model_loaded": hasattr(self, 'rl_model') and self.rl_model is not None,
-            "memory_size": len(self.memory),
+            "memory_size": self._size,
             "epsilon": self.epsilon
         }
 
@@ -4,7 +4,20 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from utils.config import CONFIG
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, List
+from joblib import Parallel, delayed
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 random.seed(CONFIG.RANDOM_SEED)
 np.random.seed(CONFIG.RANDOM_SEED)
@@ -12,73 +25,178 @@ np.random.seed(CONFIG.RANDOM_SEED)
 # Candle CSV format expectation:
 # datetime,open,high,low,close,volume  (datetime ISO or %Y-%m-%d %H:%M:%S)
 
+# Trade events recorded by _run_core, replayed for verbose output
+EVENT_BUY = 0
+EVENT_SL = 1
+EVENT_TP = 2
+
+def _run_core(closes, highs, lows, buy, contracts, premium, sl, tp, balance, commission, slippage):
+    """
+    Bar loop over precomputed strategy decisions: buy under the 30% position cap,
+    close open trades on SL/TP using the bar's low/high, and mark equity at the close.
+    Open trades are identified by their entry bar, whose decision holds their terms.
+    Returns (final balance, equity curve, events) where each event row is
+    (code, bar, entry bar, cost or realized pnl, balance after the event).
+    """
+    n = closes.shape[0]
+    equity = np.empty(n)
+    events = np.empty((2 * n, 5))
+    n_events = 0
+    open_bars = np.empty(n, dtype=np.int64)
+    n_open = 0
+    # running totals over open trades, so unrealized pnl is close * contracts - entry cost
+    open_contracts = 0.0
+    open_entry_cost = 0.0
+    for i in range(n):
+        if buy[i]:
+            cost = premium[i] * contracts[i]
+            cost += commission
+            # slippage: reduce fill favorably/unfavorably
+            cost += slippage * contracts[i]
+            if cost <= balance * 0.3:  # position cap rule
+                balance -= cost
+                open_bars[n_open] = i
+                n_open += 1
+                open_contracts += contracts[i]
+                open_entry_cost += premium[i] * contracts[i]
+                events[n_events, 0] = EVENT_BUY
+                events[n_events, 1] = i
+                events[n_events, 2] = i
+                events[n_events, 3] = cost
+                events[n_events, 4] = balance
+                n_events += 1
+
+        # Evaluate open trades (naive: check if sl/tp hit using candle low/high).
+        # The open book is struct-of-arrays (entry bars indexing the decision arrays),
+        # so SL/TP hits are found with masks over all open trades at once
+        if n_open > 0:
+            js = open_bars[:n_open]
+            hit_sl = lows[i] <= sl[js]
+            hit_tp = ~hit_sl & (highs[i] >= tp[js])
+            closed = hit_sl | hit_tp
+            if closed.any():
+                for k in np.flatnonzero(closed):
+                    j = js[k]
+                    if hit_sl[k]:
+                        # hit SL -> loss; premium already paid, so balance is unchanged
+                        code = EVENT_SL
+                        pnl = - (premium[j] - sl[j]) * contracts[j]
+                    else:
+                        code = EVENT_TP
+                        pnl = (tp[j] - premium[j]) * contracts[j]
+                        balance += premium[j] * contracts[j] + pnl  # assume we get back cost + pnl
+                    open_contracts -= contracts[j]
+                    open_entry_cost -= premium[j] * contracts[j]
+                    events[n_events, 0] = code
+                    events[n_events, 1] = i
+                    events[n_events, 2] = j
+                    events[n_events, 3] = pnl
+                    events[n_events, 4] = balance
+                    n_events += 1
+                # keep the ones still open in entry order
+                still_open = js[~closed]
+                n_open = still_open.shape[0]
+                open_bars[:n_open] = still_open
+        if n_open == 0:
+            # drop any rounding residue left by the running totals
+            open_contracts = 0.0
+            open_entry_cost = 0.0
+
+        # Track equity snapshot (balance + unrealized placeholders)
+        equity[i] = balance + closes[i] * open_contracts - open_entry_cost
+    return balance, equity, events[:n_events]
+
+if NUMBA_AVAILABLE:
+    _run_core = njit(cache=True)(_run_core)
+
+def _load_candles(csv_path:str) -> pd.DataFrame:
+    # Parsed candles are cached as Parquet beside the CSV and reused until the CSV is newer
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if (PYARROW_AVAILABLE and os.path.exists(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return pd.read_parquet(parquet_path)
+
+    # pyarrow's CSV reader parses on multiple threads; the C parser is the fallback
+    df = pd.read_csv(
+        csv_path, parse_dates=["datetime"],
+        engine="pyarrow" if PYARROW_AVAILABLE else "c"
+    ).sort_values("datetime").reset_index(drop=True)
+
+    if PYARROW_AVAILABLE:
+        try:
+            # write then rename so concurrent runs never read a half-written file
+            tmp_path = parquet_path + ".tmp"
+            df.to_parquet(tmp_path, compression="zstd", index=False)
+            os.replace(tmp_path, parquet_path)
+        except OSError:
+            pass  # read-only data dir: keep parsing the CSV
+    return df
+
 class Backtester:
     def __init__(self, symbol:str, data_path:str, initial_capital:float=CONFIG.CAPITAL):
         self.symbol = symbol
-        self.df = pd.read_csv(os.path.join(data_path, f"{symbol}.csv"), parse_dates=["datetime"]).sort_values("datetime").reset_index(drop=True)
+        self.df = _load_candles(os.path.join(data_path, f"{symbol}.csv"))
         self.capital = initial_capital
         self.equity_curve = []
         self.positions = []
         self.commission = CONFIG.COMMISSION_PER_TRADE
         self.slippage = CONFIG.SLIPPAGE_PTS
-
-    def simulate_option_premium(self, row:pd.Series) -> float:
-        # Simple heuristic: option ATM premium proportional to volatility & price
-        price = row["close"]
+        # Simple heuristic: option ATM premium proportional to volatility & price,
+        # computed for every bar once so per-bar lookups are a plain index
+        price = self.df["close"].to_numpy(dtype=np.float64)
         # simplistic implied vol proxy: rolling std of returns
-        vol = self.df["close"].pct_change().rolling(50).std().loc[row.name]
-        if np.isnan(vol): vol = 0.01
-        premium = max(5.0, (price * vol * 10))  # tune multiplier
-        return float(premium)
+        rets = np.empty_like(price)
+        rets[0] = np.nan
+        rets[1:] = price[1:] / price[:-1] - 1
+        vol = pd.Series(rets).rolling(50).std().to_numpy()
+        vol = np.where(np.isnan(vol), 0.01, vol)
+        self._premiums = np.maximum(5.0, price * vol * 10)  # tune multiplier
+
+    def option_premiums(self) -> np.ndarray:
+        return self._premiums
+
+    def simulate_option_premium(self, idx) -> float:
+        # idx is a bar index; a row of self.df is still accepted and uses its index label
+        if isinstance(idx, pd.Series):
+            idx = idx.name
+        return float(self._premiums[idx])
 
     def run(self, strategy_fn: Callable[[pd.DataFrame, int], Dict[str,Any]], verbose=True):
-        balance = self.capital
-        open_trades = []
-        for i, row in self.df.iterrows():
-            # let strategy decide at index i (use past window inside strategy)
-            decision = strategy_fn(self.df, i)
-            # decision example: {"action":"BUY_OPT","contracts":1,"premium":premium,"sl":sl,"tp":tp}
-            if decision:
-                action = decision.get("action")
-                if action == "BUY_OPT":
-                    cost = decision["premium"] * decision["contracts"]
-                    cost += self.commission
-                    # slippage: reduce fill favorably/unfavorably
-                    cost += self.slippage * decision["contracts"]
-                    if cost <= balance * 0.3:  # position cap rule
-                        balance -= cost
-                        open_trades.append({"entry_index": i, "contracts": decision["contracts"], "entry_premium": decision["premium"], "sl":decision["sl"], "tp":decision["tp"], "status":"OPEN"})
-                        if verbose:
-                            print(f"[{row['datetime']}] Bought {decision['contracts']} opt at {decision['premium']:.2f}, cost {cost:.2f} bal {balance:.2f}")
-            # Evaluate open trades (naive: check if sl/tp hit using candle low/high)
-            to_close = []
-            for t in open_trades:
-                if t["status"]!="OPEN": continue
-                # for simplicity check current candle high/low to see if target hit
-                if row["low"] <= t["sl"]:
-                    # hit SL -> loss
-                    pnl = - (t["entry_premium"] - t["sl"]) * t["contracts"]
-                    balance += 0  # premium already paid; realize loss separately
-                    t["status"]="CLOSED"
-                    t["exit_index"]=i
-                    t["pnl"]=pnl
-                    to_close.append(t)
-                    if verbose: print(f"[{row['datetime']}] SL hit for trade entered at {t['entry_index']} pnl {pnl:.2f}")
-                elif row["high"] >= t["tp"]:
-                    pnl = (t["tp"] - t["entry_premium"]) * t["contracts"]
-                    balance += t["entry_premium"]*t["contracts"] + pnl  # assume we get back cost + pnl
-                    t["status"]="CLOSED"
-                    t["exit_index"]=i
-                    t["pnl"]=pnl
-                    to_close.append(t)
-                    if verbose: print(f"[{row['datetime']}] TP hit for trade entered at {t['entry_index']} pnl {pnl:.2f}")
-            # remove closed trades
-            for c in to_close:
-                open_trades.remove(c)
-            # Track equity snapshot (balance + unrealized placeholders)
-            unrealized = sum([(row["close"] - t["entry_premium"]) * t["contracts"] for t in open_trades])
-            self.equity_curve.append(balance + unrealized)
-        self.capital = balance + sum([(t.get("pnl",0)) for t in (open_trades+[] )])
+        n = len(self.df)
+        # let strategy decide at each index i (use past window inside strategy);
+        # decisions only depend on the data, so they are collected up front
+        # decision example: {"action":"BUY_OPT","contracts":1,"premium":premium,"sl":sl,"tp":tp}
+        decisions = [strategy_fn(self.df, i) for i in range(n)]
+        buy = np.zeros(n, dtype=np.bool_)
+        contracts, premium, sl, tp = np.zeros((4, n))
+        for i, decision in enumerate(decisions):
+            if decision and decision.get("action") == "BUY_OPT":
+                buy[i] = True
+                contracts[i] = decision["contracts"]
+                premium[i] = decision["premium"]
+                sl[i] = decision["sl"]
+                tp[i] = decision["tp"]
+
+        closes, highs, lows = self.df[["close", "high", "low"]].to_numpy(dtype=np.float64).T
+        balance, equity, events = _run_core(
+            np.ascontiguousarray(closes), np.ascontiguousarray(highs), np.ascontiguousarray(lows),
+            buy, contracts, premium, sl, tp,
+            float(self.capital), float(self.commission), float(self.slippage)
+        )
+
+        if verbose:
+            times = self.df["datetime"].tolist()
+            for code, i, j, value, balance_after in events.tolist():
+                i, j = int(i), int(j)
+                if code == EVENT_BUY:
+                    print(f"[{times[i]}] Bought {decisions[i]['contracts']} opt at {decisions[i]['premium']:.2f}, cost {value:.2f} bal {balance_after:.2f}")
+                elif code == EVENT_SL:
+                    print(f"[{times[i]}] SL hit for trade entered at {j} pnl {value:.2f}")
+                else:
+                    print(f"[{times[i]}] TP hit for trade entered at {j} pnl {value:.2f}")
+
+        self.equity_curve.extend(equity.tolist())
+        self.capital = float(balance)
         return self.summary()
 
     def summary(self):
@@ -88,30 +206,53 @@ class Backtester:
         }
         return s
 
-# Example strategy function for backtester (simple MACD+RSI rule)
-def example_strategy(df:pd.DataFrame, idx:int):
-    if idx < 60: return None
-    window = df.iloc[max(0, idx-50):idx]
-    close = window["close"]
-    ema12 = close.ewm(span=12).mean().iloc[-1]
-    ema26 = close.ewm(span=26).mean().iloc[-1]
-    macd = ema12 - ema26
-    rsi = (100 - (100/(1 + ((close.diff().clip(lower=0).rolling(14).mean().iloc[-1])/( -close.diff().clip(upper=0).abs().rolling(14).mean().iloc[-1] + 1e-9)))))
-    # get premium using current row approximate
-    row = df.iloc[idx]
-    price = row["close"]
-    # compute simple premium
-    premium = max(10.0, price * 0.0005)
-    if macd > 0 and rsi > 45 and premium > 30:
-        sl = premium * 0.4
-        tp = premium * 1.5
-        return {"action":"BUY_OPT","contracts":1,"premium":premium,"sl":sl,"tp":tp}
-    return None
+# Example strategy for backtester (simple MACD+RSI rule). Indicators are computed
+# once over the whole series; the returned strategy function only indexes them.
+def make_example_strategy(df:pd.DataFrame):
+    close = df["close"]
+    ema12 = close.ewm(span=12, adjust=False).mean().to_numpy()
+    ema26 = close.ewm(span=26, adjust=False).mean().to_numpy()
+    # Wilder-smoothed RSI(14)
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1/14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1/14, adjust=False).mean()
+    rsi = (100 - 100 / (1 + gain / (loss + 1e-9))).to_numpy()
+    closes = close.to_numpy()
+
+    def example_strategy(df:pd.DataFrame, idx:int):
+        if idx < 60: return None
+        # indicators as of the previous bar, like the trailing window they replace
+        macd = ema12[idx-1] - ema26[idx-1]
+        r = rsi[idx-1]
+        # compute simple premium using current row approximate
+        price = closes[idx]
+        premium = max(10.0, price * 0.0005)
+        if macd > 0 and r > 45 and premium > 30:
+            sl = premium * 0.4
+            tp = premium * 1.5
+            return {"action":"BUY_OPT","contracts":1,"premium":premium,"sl":sl,"tp":tp}
+        return None
+
+    return example_strategy
+
+def run_backtest(symbol:str, data_path:str, strategy_factory:Callable[[pd.DataFrame], Callable], seed:int=CONFIG.RANDOM_SEED):
+    # one symbol's backtest; module-level so worker processes can unpickle it
+    random.seed(seed)
+    np.random.seed(seed)
+    bt = Backtester(symbol, data_path)
+    return bt.run(strategy_factory(bt.df), verbose=False)
+
+def run_backtests(symbols:List[str], data_path:str, strategy_factory=make_example_strategy, n_jobs:int=-1) -> Dict[str, Dict[str, Any]]:
+    # symbols are independent, so each runs in its own process with its own seed
+    reports = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(run_backtest)(symbol, data_path, strategy_factory, CONFIG.RANDOM_SEED + i)
+        for i, symbol in enumerate(symbols)
+    )
+    return dict(zip(symbols, reports))
 
 if __name__ == "__main__":
-    # example usage (ensure you have data/backtest_5m/NIFTY.csv)
-    symbol = "NIFTY"
+    # example usage (ensure you have data/backtest_5m/<SYMBOL>.csv for each symbol)
     path = CONFIG.BACKTEST_DATA_PATH
-    bt = Backtester(symbol, path)
-    report = bt.run(example_strategy, verbose=False)
-    print("Backtest finished:", report)
\ No newline at end of file
+    symbols = [s for s in CONFIG.SYMBOLS if os.path.exists(os.path.join(path, f"{s}.csv"))]
+    for symbol, report in run_backtests(symbols, path).items():
+        print(f"Backtest finished for {symbol}:", report)
@@ -9,9 +9,48 @@ from typing import Dict, List, Optional, Any, Union
 import logging
 from datetime import datetime, timedelta
 import asyncio
+import hashlib
+import hmac
+import time
+import aiohttp
+import numpy as np
+import orjson
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Quote requests in flight at once per adapter, kept under brokers' rate limits
+QUOTE_CONCURRENCY = 32
+
+# How long get_order may answer from the last fetched orders before asking the broker
+ORDERS_CACHE_TTL = 0.5
+
+NS_PER_DAY = 86_400_000_000_000
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+async def _json(response: aiohttp.ClientResponse) -> Any:
+    """Parse a broker response body with orjson"""
+    return orjson.loads(await response.read())
+
+CANDLE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+def candles_to_frame(candles: List[List[Any]]) -> pd.DataFrame:
+    """Convert [epoch_ms, open, high, low, close, volume] rows to an OHLCV frame indexed by UTC timestamp"""
+    if len(candles):
+        # extra trailing fields (e.g. open interest) are ignored
+        arr = np.asarray(candles, dtype=np.float64)[:, :len(CANDLE_COLUMNS) + 1]
+    else:
+        arr = np.empty((0, len(CANDLE_COLUMNS) + 1))
+    return pd.DataFrame(
+        arr[:, 1:], columns=CANDLE_COLUMNS,
+        index=pd.DatetimeIndex(pd.to_datetime(arr[:, 0], unit="ms", utc=True), name="timestamp")
+    )
+
+def as_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Candle frame back to the list-of-dicts shape get_historical_data used to return"""
+    return df.reset_index().to_dict("records")
+
 class BrokerError(Exception):
     """Base exception for broker-related errors"""
     pass
@@ -30,6 +69,8 @@ class MarketClosedError(BrokerError):
 
 class BrokerCredentials:
     """Container for broker credentials"""
+    __slots__ = ("api_key", "api_secret", "access_token", "request_token")
+
     def __init__(self, api_key: str, api_secret: Optional[str] = None,
                  access_token: Optional[str] = None, request_token: Optional[str] = None):
         self.api_key = api_key
@@ -39,6 +80,8 @@ class BrokerCredentials:
 
 class Order:
     """Unified order representation"""
+    __slots__ = ("order_id", "symbol", "side", "quantity", "price", "order_type", "status", "timestamp")
+
     def __init__(self, order_id: str, symbol: str, side: str, quantity: float,
                  price: Optional[float] = None, order_type: str = "limit",
                  status: str = "pending", timestamp: Optional[datetime] = None):
@@ -65,6 +108,8 @@ class Order:
 
 class Position:
     """Unified position representation"""
+    __slots__ = ("symbol", "quantity", "average_price", "current_price", "pnl", "pnl_percentage")
+
     def __init__(self, symbol: str, quantity: float, average_price: float,
                  current_price: float, pnl: float, pnl_percentage: float):
         self.symbol = symbol
@@ -86,6 +131,8 @@ class Position:
 
 class Quote:
     """Unified market quote representation"""
+    __slots__ = ("symbol", "price", "change", "change_percent", "volume", "high", "low", "timestamp")
+
     def __init__(self, symbol: str, price: float, change: float,
                  change_percent: float, volume: Optional[int] = None,
                  high: Optional[float] = None, low: Optional[float] = None,
@@ -114,9 +161,53 @@ class Quote:
 class BrokerAdapter(ABC):
     """Abstract base class for broker adapters"""
 
+    # API root; the adapter's session resolves request paths against it
+    base_url: Optional[str] = None
+
     def __init__(self, credentials: BrokerCredentials):
         self.credentials = credentials
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._quote_semaphore = asyncio.Semaphore(QUOTE_CONCURRENCY)
+        self._orders_cache: Dict[str, Order] = {}
+        self._orders_cache_ts = 0.0
+
+    def _cache_orders(self, orders: List[Order]) -> None:
+        # get_orders swaps in a fresh snapshot of every order
+        self._orders_cache = {order.order_id: order for order in orders}
+        self._orders_cache_ts = time.monotonic()
+
+    def _cached_order(self, order_id: str) -> Optional[Order]:
+        if time.monotonic() - self._orders_cache_ts < ORDERS_CACHE_TTL:
+            return self._orders_cache.get(order_id)
+        return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One keep-alive pool for the adapter's lifetime, so broker calls skip TCP/TLS setup
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                headers=self._default_headers(),
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=32,
+                                               ttl_dns_cache=300, keepalive_timeout=75)
+            )
+        return self._session
+
+    def _default_headers(self) -> Dict[str, str]:
+        """Headers sent with every request on the adapter's session"""
+        return {}
+
+    async def close(self) -> None:
+        """Close the adapter's HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     @abstractmethod
     async def initialize(self) -> bool:
@@ -156,8 +247,11 @@ class BrokerAdapter(ABC):
 
     @abstractmethod
     async def get_historical_data(self, symbol: str, interval: str,
-                                days: int = 30) -> List[Dict[str, Any]]:
-        """Get historical market data"""
+                                days: int = 30) -> pd.DataFrame:
+        """Get historical OHLCV candles as a candles_to_frame DataFrame indexed by UTC timestamp
+
+        Callers that need the old List[Dict] shape can convert with as_records()
+        """
         pass
 
     @abstractmethod
@@ -181,6 +275,11 @@ class DhanBrokerAdapter(BrokerAdapter):
     def get_broker_type(self) -> str:
         return "dhan"
 
+    def _default_headers(self) -> Dict[str, str]:
+        if self.session_token:
+            return {"Authorization": f"Bearer {self.session_token}"}
+        return {}
+
     def supports_asset_type(self, asset_type: str) -> bool:
         return asset_type in ["traditional", "stocks", "equity", "commodity"]
 
@@ -191,21 +290,24 @@ class DhanBrokerAdapter(BrokerAdapter):
                 raise BrokerError("Dhan requires request token for initialization")
 
             # Exchange request token for access token
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/v2/token",
-                    json={
-                        "api_key": self.credentials.api_key,
-                        "request_token": self.credentials.request_token
-                    }
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self.session_token = data.get("access_token")
-                        return True
-                    else:
-                        error_data = await response.json()
-                        raise BrokerError(f"Dhan auth failed: {error_data}")
+            session = self._get_session()
+            async with session.post(
+                "/v2/token",
+                data=orjson.dumps({
+                    "api_key": self.credentials.api_key,
+                    "request_token": self.credentials.request_token
+                }),
+                headers=JSON_HEADERS
+            ) as response:
+                if response.status == 200:
+                    data = await _json(response)
+                    self.session_token = data.get("access_token")
+                    # reopen the session so every later call carries the bearer token
+                    await self.close()
+                    return True
+                else:
+                    error_data = await _json(response)
+                    raise BrokerError(f"Dhan auth failed: {error_data}")
 
         except Exception as e:
             self.logger.error(f"Dhan initialization failed: {e}")
@@ -231,29 +333,28 @@ class DhanBrokerAdapter(BrokerAdapter):
                 "triggerPrice": 0
             }
 
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-                async with session.post(
-                    f"{self.base_url}/v2/orders",
-                    json=order_data,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return Order(
-                            order_id=result["orderId"],
-                            symbol=symbol,
-                            side=side,
-                            quantity=quantity,
-                            price=price,
-                            order_type=order_type,
-                            status="pending"
-                        )
-                    else:
-                        error_data = await response.json()
-                        if "insufficient funds" in str(error_data).lower():
-                            raise InsufficientFundsError(f"Dhan: {error_data}")
-                        raise BrokerError(f"Dhan order failed: {error_data}")
+            session = self._get_session()
+            async with session.post(
+                "/v2/orders",
+                data=orjson.dumps(order_data),
+                headers=JSON_HEADERS
+            ) as response:
+                if response.status == 200:
+                    result = await _json(response)
+                    return Order(
+                        order_id=result["orderId"],
+                        symbol=symbol,
+                        side=side,
+                        quantity=quantity,
+                        price=price,
+                        order_type=order_type,
+                        status="pending"
+                    )
+                else:
+                    error_data = await _json(response)
+                    if "insufficient funds" in str(error_data).lower():
+                        raise InsufficientFundsError(f"Dhan: {error_data}")
+                    raise BrokerError(f"Dhan order failed: {error_data}")
 
         except aiohttp.ClientError as e:
             raise BrokerError(f"Dhan API error: {e}")
@@ -264,13 +365,9 @@ class DhanBrokerAdapter(BrokerAdapter):
             raise BrokerError("Dhan not initialized")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-                async with session.delete(
-                    f"{self.base_url}/v2/orders/{order_id}",
-                    headers=headers
-                ) as response:
-                    return response.status == 200
+            session = self._get_session()
+            async with session.delete(f"/v2/orders/{order_id}") as response:
+                return response.status == 200
         except Exception as e:
             self.logger.error(f"Dhan cancel order failed: {e}")
             return False
@@ -281,35 +378,47 @@ class DhanBrokerAdapter(BrokerAdapter):
             raise BrokerError("Dhan not initialized")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-                async with session.get(
-                    f"{self.base_url}/v2/orders",
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        orders_data = await response.json()
-                        return [
-                            Order(
-                                order_id=order["orderId"],
-                                symbol=order["securityId"],
-                                side=order["transactionType"].lower(),
-                                quantity=order["quantity"],
-                                price=order.get("price"),
-                                status=order["orderStatus"].lower(),
-                                timestamp=datetime.fromisoformat(order["orderTimestamp"])
-                            )
-                            for order in orders_data
-                        ]
-                    return []
+            session = self._get_session()
+            async with session.get("/v2/orders") as response:
+                if response.status == 200:
+                    orders_data = await _json(response)
+                    orders = [self._parse_order(order) for order in orders_data]
+                    self._cache_orders(orders)
+                    return orders
+                return []
         except Exception as e:
             self.logger.error(f"Dhan get orders failed: {e}")
             return []
 
+    def _parse_order(self, order: Dict[str, Any]) -> Order:
+        return Order(
+            order_id=order["orderId"],
+            symbol=order["securityId"],
+            side=order["transactionType"].lower(),
+            quantity=order["quantity"],
+            price=order.get("price"),
+            status=order["orderStatus"].lower(),
+            timestamp=datetime.fromisoformat(order["orderTimestamp"])
+        )
+
     async def get_order(self, order_id: str) -> Optional[Order]:
         """Get specific Dhan order"""
-        orders = await self.get_orders()
-        return next((order for order in orders if order.order_id == order_id), None)
+        cached = self._cached_order(order_id)
+        if cached is not None:
+            return cached
+
+        if not self.session_token:
+            raise BrokerError("Dhan not initialized")
+
+        try:
+            session = self._get_session()
+            async with session.get(f"/v2/orders/{order_id}") as response:
+                if response.status == 200:
+                    return self._parse_order(await _json(response))
+                return None
+        except Exception as e:
+            self.logger.error(f"Dhan get order failed: {e}")
+            return None
 
     async def get_portfolio(self) -> List[Position]:
         """Get Dhan portfolio"""
@@ -317,32 +426,28 @@ class DhanBrokerAdapter(BrokerAdapter):
             raise BrokerError("Dhan not initialized")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-                async with session.get(
-                    f"{self.base_url}/v2/holdings",
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        holdings = await response.json()
-                        positions = []
-
-                        for holding in holdings:
-                            # Get current price (simplified - would need quotes API)
-                            current_price = holding.get("lastPrice", holding["avgCostPrice"])
-                            pnl = (current_price - holding["avgCostPrice"]) * holding["totalQty"]
-
-                            positions.append(Position(
-                                symbol=holding["tradingSymbol"],
-                                quantity=holding["totalQty"],
-                                average_price=holding["avgCostPrice"],
-                                current_price=current_price,
-                                pnl=pnl,
-                                pnl_percentage=(pnl / (holding["avgCostPrice"] * holding["totalQty"])) * 100
-                            ))
-
-                        return positions
-                    return []
+            session = self._get_session()
+            async with session.get("/v2/holdings") as response:
+                if response.status == 200:
+                    holdings = await _json(response)
+                    positions = []
+
+                    for holding in holdings:
+                        # Get current price (simplified - would need quotes API)
+                        current_price = holding.get("lastPrice", holding["avgCostPrice"])
+                        pnl = (current_price - holding["avgCostPrice"]) * holding["totalQty"]
+
+                        positions.append(Position(
+                            symbol=holding["tradingSymbol"],
+                            quantity=holding["totalQty"],
+                            average_price=holding["avgCostPrice"],
+                            current_price=current_price,
+                            pnl=pnl,
+                            pnl_percentage=(pnl / (holding["avgCostPrice"] * holding["totalQty"])) * 100
+                        ))
+
+                    return positions
+                return []
         except Exception as e:
             self.logger.error(f"Dhan get portfolio failed: {e}")
             return []
@@ -352,34 +457,35 @@ class DhanBrokerAdapter(BrokerAdapter):
         if not self.session_token:
             raise BrokerError("Dhan not initialized")
 
+        session = self._get_session()
+
+        async def fetch_one(symbol: str) -> Optional[Quote]:
+            async with self._quote_semaphore:
+                async with session.get(f"/v2/marketfeed/{symbol}") as response:
+                    if response.status != 200:
+                        return None
+                    quote_data = await _json(response)
+            return Quote(
+                symbol=symbol,
+                price=quote_data.get("lastPrice", 0),
+                change=quote_data.get("netChange", 0),
+                change_percent=quote_data.get("percentChange", 0),
+                volume=quote_data.get("volume"),
+                high=quote_data.get("ohlc", {}).get("high"),
+                low=quote_data.get("ohlc", {}).get("low")
+            )
+
+        results = await asyncio.gather(*(fetch_one(s) for s in symbols), return_exceptions=True)
         quotes = {}
-        try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-
-                for symbol in symbols:
-                    async with session.get(
-                        f"{self.base_url}/v2/marketfeed/{symbol}",
-                        headers=headers
-                    ) as response:
-                        if response.status == 200:
-                            quote_data = await response.json()
-                            quotes[symbol] = Quote(
-                                symbol=symbol,
-                                price=quote_data.get("lastPrice", 0),
-                                change=quote_data.get("netChange", 0),
-                                change_percent=quote_data.get("percentChange", 0),
-                                volume=quote_data.get("volume"),
-                                high=quote_data.get("ohlc", {}).get("high"),
-                                low=quote_data.get("ohlc", {}).get("low")
-                            )
-        except Exception as e:
-            self.logger.error(f"Dhan get quotes failed: {e}")
-
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Dhan get quote for {symbol} failed: {result}")
+            elif result is not None:
+                quotes[symbol] = result
         return quotes
 
     async def get_historical_data(self, symbol: str, interval: str,
-                                days: int = 30) -> List[Dict[str, Any]]:
+                                days: int = 30) -> pd.DataFrame:
         """Get Dhan historical data"""
         if not self.session_token:
             raise BrokerError("Dhan not initialized")
@@ -394,34 +500,21 @@ class DhanBrokerAdapter(BrokerAdapter):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
 
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.session_token}"}
-                async with session.get(
-                    f"{self.base_url}/v2/charts/{symbol}",
-                    params={
-                        "from": start_date.strftime("%Y-%m-%d"),
-                        "to": end_date.strftime("%Y-%m-%d"),
-                        "interval": dhan_interval
-                    },
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return [
-                            {
-                                "timestamp": datetime.fromtimestamp(candle[0]/1000),
-                                "open": candle[1],
-                                "high": candle[2],
-                                "low": candle[3],
-                                "close": candle[4],
-                                "volume": candle[5]
-                            }
-                            for candle in data
-                        ]
-                    return []
+            session = self._get_session()
+            async with session.get(
+                f"/v2/charts/{symbol}",
+                params={
+                    "from": start_date.strftime("%Y-%m-%d"),
+                    "to": end_date.strftime("%Y-%m-%d"),
+                    "interval": dhan_interval
+                }
+            ) as response:
+                if response.status == 200:
+                    return candles_to_frame(await _json(response))
+                return candles_to_frame([])
         except Exception as e:
             self.logger.error(f"Dhan get historical data failed: {e}")
-            return []
+            return candles_to_frame([])
 
 class CoinSwitchBrokerAdapter(BrokerAdapter):
     """CoinSwitch broker adapter for cryptocurrency trading"""
@@ -430,6 +523,11 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
         super().__init__(credentials)
         self.base_url = "https://api-trading.coinswitch.co"
         self.session_initialized = False
+        # HMAC keyed once with the API secret; each signature copies this state
+        self._hmac_template = (
+            hmac.new(credentials.api_secret.encode(), digestmod=hashlib.sha256)
+            if credentials.api_secret else None
+        )
 
     def get_broker_type(self) -> str:
         return "coinswitch"
@@ -444,32 +542,24 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
                 raise BrokerError("CoinSwitch requires API key and secret")
 
             # Test connection with ping
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/trade/api/v2/ping") as response:
-                    if response.status == 200:
-                        self.session_initialized = True
-                        return True
-                    return False
+            session = self._get_session()
+            async with session.get("/trade/api/v2/ping") as response:
+                if response.status == 200:
+                    self.session_initialized = True
+                    return True
+                return False
         except Exception as e:
             self.logger.error(f"CoinSwitch initialization failed: {e}")
             return False
 
     def _sign_request(self, path: str, params: Dict[str, Any]) -> str:
         """Generate HMAC-SHA256 signature for CoinSwitch"""
-        import hmac
-        import hashlib
-
-        keys = sorted(params.keys())
-        query = "&".join([f"{k}={params[k]}" for k in keys])
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
         payload = f"{path}?{query}"
 
-        signature = hmac.new(
-            self.credentials.api_secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
-
-        return signature
+        signature = self._hmac_template.copy()
+        signature.update(payload.encode())
+        return signature.hexdigest()
 
     async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make authenticated request to CoinSwitch"""
@@ -477,7 +567,7 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
             raise BrokerError("CoinSwitch not initialized")
 
         params = params or {}
-        params["timestamp"] = int(datetime.now().timestamp() * 1000)
+        params["timestamp"] = time.time_ns() // 1_000_000
 
         signature = self._sign_request(path, params)
 
@@ -487,20 +577,18 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
             "X-AUTH-SIGNATURE": signature
         }
 
-        url = f"{self.base_url}{path}"
-
-        async with aiohttp.ClientSession() as session:
-            if method == "GET":
-                async with session.get(url, params=params, headers=headers) as response:
-                    return await response.json()
-            elif method == "POST":
-                async with session.post(url, json=params, headers=headers) as response:
-                    return await response.json()
-            elif method == "DELETE":
-                async with session.delete(url, json=params, headers=headers) as response:
-                    return await response.json()
-            else:
-                raise BrokerError(f"Unsupported HTTP method: {method}")
+        session = self._get_session()
+        if method == "GET":
+            async with session.get(path, params=params, headers=headers) as response:
+                return await _json(response)
+        elif method == "POST":
+            async with session.post(path, data=orjson.dumps(params), headers=headers) as response:
+                return await _json(response)
+        elif method == "DELETE":
+            async with session.delete(path, data=orjson.dumps(params), headers=headers) as response:
+                return await _json(response)
+        else:
+            raise BrokerError(f"Unsupported HTTP method: {method}")
 
     async def place_order(self, symbol: str, side: str, quantity: float,
                          price: Optional[float] = None, order_type: str = "limit") -> Order:
@@ -552,27 +640,39 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
             result = await self._request("GET", "/trade/api/v2/orders", {})
 
             if result.get("code") == 200:
-                return [
-                    Order(
-                        order_id=order["orderId"],
-                        symbol=order["symbol"],
-                        side=order["side"],
-                        quantity=order["origQty"],
-                        price=order.get("price"),
-                        status=order["status"].lower(),
-                        timestamp=datetime.fromtimestamp(order["time"] / 1000)
-                    )
-                    for order in result.get("data", [])
-                ]
+                orders = [self._parse_order(order) for order in result.get("data", [])]
+                self._cache_orders(orders)
+                return orders
             return []
         except Exception as e:
             self.logger.error(f"CoinSwitch get orders failed: {e}")
             return []
 
+    def _parse_order(self, order: Dict[str, Any]) -> Order:
+        return Order(
+            order_id=order["orderId"],
+            symbol=order["symbol"],
+            side=order["side"],
+            quantity=order["origQty"],
+            price=order.get("price"),
+            status=order["status"].lower(),
+            timestamp=datetime.fromtimestamp(order["time"] / 1000)
+        )
+
     async def get_order(self, order_id: str) -> Optional[Order]:
         """Get specific CoinSwitch order"""
-        orders = await self.get_orders()
-        return next((order for order in orders if order.order_id == order_id), None)
+        cached = self._cached_order(order_id)
+        if cached is not None:
+            return cached
+
+        try:
+            result = await self._request("GET", "/trade/api/v2/order", {"order_id": order_id})
+            if result.get("code") == 200 and result.get("data"):
+                return self._parse_order(result["data"])
+            return None
+        except Exception as e:
+            self.logger.error(f"CoinSwitch get order failed: {e}")
+            return None
 
     async def get_portfolio(self) -> List[Position]:
         """Get CoinSwitch portfolio"""
@@ -601,29 +701,33 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
 
     async def get_quotes(self, symbols: List[str]) -> Dict[str, Quote]:
         """Get CoinSwitch market quotes"""
-        quotes = {}
-        try:
-            for symbol in symbols:
+        async def fetch_one(symbol: str) -> Optional[Quote]:
+            async with self._quote_semaphore:
                 result = await self._request("GET", "/trade/api/v2/24hr/ticker", {"symbol": symbol})
-
-                if result.get("code") == 200:
-                    data = result["data"]
-                    quotes[symbol] = Quote(
-                        symbol=symbol,
-                        price=float(data["lastPrice"]),
-                        change=float(data["priceChange"]),
-                        change_percent=float(data["priceChangePercent"]),
-                        volume=int(float(data["volume"])),
-                        high=float(data["highPrice"]),
-                        low=float(data["lowPrice"])
-                    )
-        except Exception as e:
-            self.logger.error(f"CoinSwitch get quotes failed: {e}")
-
+            if result.get("code") != 200:
+                return None
+            data = result["data"]
+            return Quote(
+                symbol=symbol,
+                price=float(data["lastPrice"]),
+                change=float(data["priceChange"]),
+                change_percent=float(data["priceChangePercent"]),
+                volume=int(float(data["volume"])),
+                high=float(data["highPrice"]),
+                low=float(data["lowPrice"])
+            )
+
+        results = await asyncio.gather(*(fetch_one(s) for s in symbols), return_exceptions=True)
+        quotes = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"CoinSwitch get quote for {symbol} failed: {result}")
+            elif result is not None:
+                quotes[symbol] = result
         return quotes
 
     async def get_historical_data(self, symbol: str, interval: str,
-                                days: int = 30) -> List[Dict[str, Any]]:
+                                days: int = 30) -> pd.DataFrame:
         """Get CoinSwitch historical data"""
         try:
             # CoinSwitch uses different interval formats
@@ -633,8 +737,9 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
             }
             cs_interval = interval_map.get(interval, "1d")
 
-            end_time = int(datetime.now().timestamp() * 1000)
-            start_time = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+            end_ns = time.time_ns()
+            end_time = end_ns // 1_000_000
+            start_time = (end_ns - days * NS_PER_DAY) // 1_000_000
 
             result = await self._request("GET", "/trade/api/v2/klines", {
                 "symbol": symbol,
@@ -645,21 +750,11 @@ class CoinSwitchBrokerAdapter(BrokerAdapter):
             })
 
             if result.get("code") == 200:
-                return [
-                    {
-                        "timestamp": datetime.fromtimestamp(candle[0] / 1000),
-                        "open": float(candle[1]),
-                        "high": float(candle[2]),
-                        "low": float(candle[3]),
-                        "close": float(candle[4]),
-                        "volume": float(candle[5])
-                    }
-                    for candle in result.get("data", [])
-                ]
-            return []
+                return candles_to_frame(result.get("data", []))
+            return candles_to_frame([])
         except Exception as e:
             self.logger.error(f"CoinSwitch get historical data failed: {e}")
-            return []
+            return candles_to_frame([])
 
 class UnifiedBrokerManager:
     """Unified broker manager that abstracts between multiple brokers"""
@@ -698,6 +793,20 @@ class UnifiedBrokerManager:
                 self.logger.error(f"Broker {name} initialization error: {e}")
         return results
 
+    async def close_all_brokers(self) -> None:
+        """Close every registered broker's HTTP session"""
+        for name, broker in self.brokers.items():
+            try:
+                await broker.close()
+            except Exception as e:
+                self.logger.error(f"Broker {name} close error: {e}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_all_brokers()
+
     async def place_unified_order(self, asset_type: str, symbol: str, side: str,
                                 quantity: float, price: Optional[float] = None,
                                 order_type: str = "limit") -> Order:
@@ -710,14 +819,16 @@ class UnifiedBrokerManager:
 
     async def get_unified_portfolio(self) -> Dict[str, List[Position]]:
         """Get portfolio from all brokers"""
+        names = list(self.brokers)
+        results = await asyncio.gather(
+            *(self.brokers[name].get_portfolio() for name in names), return_exceptions=True
+        )
         portfolio = {}
-        for name, broker in self.brokers.items():
-            try:
-                positions = await broker.get_portfolio()
-                portfolio[name] = positions
-            except Exception as e:
-                self.logger.error(f"Failed to get portfolio from {name}: {e}")
-                portfolio[name] = []
+        for name, positions in zip(names, results):
+            if isinstance(positions, Exception):
+                self.logger.error(f"Failed to get portfolio from {name}: {positions}")
+                positions = []
+            portfolio[name] = positions
         return portfolio
 
     async def get_unified_quotes(self, symbols: List[str], asset_type: str) -> Dict[str, Quote]:
@@ -786,6 +897,8 @@ async def demo_broker_abstraction():
     print("Stock quotes:", {k: v.to_dict() for k, v in stock_quotes.items()})
     print("Crypto quotes:", {k: v.to_dict() for k, v in crypto_quotes.items()})
 
+    await manager.close_all_brokers()
+
 if __name__ == "__main__":
     # Setup logging
     logging.basicConfig(level=logging.INFO)
@@ -11,6 +11,7 @@ from typing import Dict, Any
 from utils.config import CONFIG
 from services.model_train import featurize
 from utils.logger import get_logger
+from utils.ws import WS_HEARTBEAT, WS_MAX_MSG_BYTES, tune_ws_socket
 
 logger = logging.getLogger(__name__)
 
@@ -24,15 +25,80 @@ def write_trade_log(row:Dict[str,Any]):
             writer.writeheader()
         writer.writerow(row)
 
+# Feed states: LIVE on the websocket, DEGRADED on REST polling while it is down,
+# BACKFILL for the overlap after it reconnects
+FEED_LIVE = "LIVE"
+FEED_DEGRADED = "DEGRADED"
+FEED_BACKFILL = "BACKFILL"
+REST_POLL_INTERVAL = 1.0  # seconds
+RESUME_OVERLAP = 1.0  # seconds both sources run after a reconnect
+SEEN_TICKS_MAX = 10_000
+# Tick fields that identify one trade, most specific first (exchange sequence, last trade time)
+TICK_ID_FIELDS = ("seq", "ltt", "timestamp")
+
+def _tick_key(data:dict):
+    """(symbol, sequence/ltt, price) for a tick, or None when it lacks those fields"""
+    symbol = data.get("symbol")
+    price = data.get("ltp")
+    stamp = next((data[f] for f in TICK_ID_FIELDS if data.get(f) is not None), None)
+    if symbol is None or price is None or stamp is None:
+        return None
+    return (symbol, stamp, price)
+
 class WSFetcher:
-    def __init__(self, url:str, subscribe_payload:dict, message_callback, reconnect_delay=2.0):
+    def __init__(self, url:str, subscribe_payload:dict, message_callback, reconnect_delay=2.0, rest_poll=None):
         self.url = url
         self.sub_payload = subscribe_payload
         self.cb = message_callback
         self.reconnect_delay = reconnect_delay
+        # optional coroutine returning a list of ticks, polled while the websocket is down
+        self.rest_poll = rest_poll
         self.keep_running = True
         self.session = None
         self.ws = None
+        self.state = FEED_DEGRADED
+        self._poll_task = None
+        self._seen = set()  # tick keys delivered while REST polling runs
+
+    async def _emit(self, data:dict):
+        # only while REST polling runs can the same tick arrive twice (from REST and
+        # the websocket, or from consecutive polls); otherwise ticks pass straight on
+        if self._poll_task is not None:
+            key = _tick_key(data)
+            if key is not None:
+                if key in self._seen:
+                    return
+                if len(self._seen) >= SEEN_TICKS_MAX:
+                    self._seen.clear()
+                self._seen.add(key)
+        await self.cb(data)
+
+    async def _rest_poll_loop(self):
+        while self.keep_running:
+            try:
+                for data in await self.rest_poll():
+                    await self._emit(data)
+            except Exception as e:
+                logger.warning(f"REST backfill poll failed: {e}")
+            await asyncio.sleep(REST_POLL_INTERVAL)
+
+    def _degrade(self):
+        self.state = FEED_DEGRADED
+        if self.rest_poll and (self._poll_task is None or self._poll_task.done()):
+            self._poll_task = asyncio.create_task(self._rest_poll_loop())
+
+    def _stop_polling(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+    async def _resume(self):
+        # keep REST running for one overlap window so no tick is lost in the handover
+        self.state = FEED_BACKFILL
+        await asyncio.sleep(RESUME_OVERLAP)
+        self._stop_polling()
+        self._seen.clear()
+        self.state = FEED_LIVE
 
     async def connect(self):
         headers = {
@@ -40,27 +106,36 @@ class WSFetcher:
             "X-Client-Id": CONFIG.BROKER['client_id']
         }
         while self.keep_running:
+            self._degrade()
+            resume_task = None
             try:
                 async with aiohttp.ClientSession(headers=headers) as session:
                     self.session = session
-                    async with session.ws_connect(self.url) as ws:
+                    async with session.ws_connect(self.url, heartbeat=WS_HEARTBEAT, max_msg_size=WS_MAX_MSG_BYTES) as ws:
                         self.ws = ws
+                        tune_ws_socket(ws)
                         # send subscription
                         if self.sub_payload:
                             await ws.send_json(self.sub_payload)
+                        resume_task = asyncio.create_task(self._resume())
                         async for msg in ws:
                             if msg.type == aiohttp.WSMsgType.TEXT:
                                 data = json.loads(msg.data)
                                 # user callback handles ticks
-                                await self.cb(data)
+                                await self._emit(data)
                             elif msg.type == aiohttp.WSMsgType.ERROR:
                                 break
             except Exception as e:
                 print("WS error", e, "reconnecting in", self.reconnect_delay)
                 await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if resume_task:
+                    resume_task.cancel()
+        self._stop_polling()
 
     def stop(self):
         self.keep_running = False
+        self._stop_polling()
 
 class RealTimeFetcher:
     def __init__(self, adapter=None):
@@ -22,6 +22,8 @@ class AlphaVantageClient:
         self.last_reset = datetime.now()
         self.daily_limit = 500
         self.minute_limit = 5
+        # Serializes the counter check so concurrent requests wait their turn
+        self._rate_lock = asyncio.Lock()
 
     async def initialize(self):
         """Initialize HTTP session"""
@@ -36,22 +38,24 @@ class AlphaVantageClient:
 
     async def _rate_limit_check(self) -> bool:
         """Check and enforce rate limits"""
-        now = datetime.now()
-
-        # Reset minute counter
-        if (now - self.last_reset).seconds >= 60:
-            self.call_count = 0
-            self.last_reset = now
-
-        # Check limits
-        if self.call_count >= self.minute_limit:
-            wait_time = 60 - (now - self.last_reset).seconds
-            logger.warning(f"Rate limit reached. Waiting {wait_time} seconds...")
-            await asyncio.sleep(wait_time)
-            self.call_count = 0
-
-        self.call_count += 1
-        return True
+        async with self._rate_lock:
+            now = datetime.now()
+
+            # Reset minute counter
+            if (now - self.last_reset).seconds >= 60:
+                self.call_count = 0
+                self.last_reset = now
+
+            # Check limits
+            if self.call_count >= self.minute_limit:
+                wait_time = 60 - (now - self.last_reset).seconds
+                logger.warning(f"Rate limit reached. Waiting {wait_time} seconds...")
+                await asyncio.sleep(wait_time)
+                self.call_count = 0
+                self.last_reset = datetime.now()
+
+            self.call_count += 1
+            return True
 
     async def get_quote(self, symbol: str, exchange: str = "NSE") -> Optional[Dict]:
         """Get real-time quote for a symbol"""
@@ -2,6 +2,7 @@
 import asyncio, json, time
 import aiohttp
 from typing import Callable, Any, Dict
+from utils.ws import WS_HEARTBEAT, WS_MAX_MSG_BYTES, tune_ws_socket
 
 class WSFetcher:
     def __init__(self, url:str, subscribe_payload:dict, message_callback:Callable[[dict],Any], reconnect_delay=2.0):
@@ -18,8 +19,9 @@ class WSFetcher:
             try:
                 async with aiohttp.ClientSession() as session:
                     self.session = session
-                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                    async with session.ws_connect(self.url, heartbeat=WS_HEARTBEAT, max_msg_size=WS_MAX_MSG_BYTES) as ws:
                         self.ws = ws
+                        tune_ws_socket(ws)
                         # send subscription
                         if self.sub_payload:
                             await ws.send_json(self.sub_payload)
@@ -37,15 +39,42 @@ class WSFetcher:
     def stop(self):
         self.keep_running = False
 
+# Orders waiting for a worker; submitters wait once this many are queued
+ORDER_QUEUE_MAX_SIZE = 10_000
+
 class OrderExecutor:
     def __init__(self, broker_adapter):
         self.broker = broker_adapter
-        self.order_queue = asyncio.Queue()
+        self.order_queue = asyncio.Queue(maxsize=ORDER_QUEUE_MAX_SIZE)
+        self.running = True
+        self.workers = []
+
+    def start(self, num_workers:int=5):
+        # long-lived consumers; submit_order only enqueues and returns
         self.running = True
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
 
     async def submit_order(self, order:dict):
         await self.order_queue.put(order)
 
+    async def submit_orders(self, orders:list):
+        # merge orders that are identical apart from qty so each goes to the broker once;
+        # anything carrying its own identity (user, client id, trigger, ...) stays separate
+        merged: Dict[Any, dict] = {}
+        for i, order in enumerate(orders):
+            key = i
+            if "qty" in order:
+                try:
+                    key = frozenset((k, v) for k, v in order.items() if k != "qty")
+                except TypeError:
+                    key = i  # unhashable field values: don't try to merge
+            if key in merged:
+                merged[key]["qty"] += order["qty"]
+            else:
+                merged[key] = dict(order)
+        for order in merged.values():
+            await self.order_queue.put(order)
+
     async def worker(self):
         while self.running:
             try:
@@ -60,6 +89,9 @@ class OrderExecutor:
 
     def stop(self):
         self.running = False
+        for task in self.workers:
+            task.cancel()
+        self.workers = []
 
 # USAGE example
 async def tick_handler(msg):
@@ -77,8 +109,11 @@ async def main_ws():
     fetcher = WSFetcher(url, sub, tick_handler)
     bro = DummyBrokerAdapter()
     exe = OrderExecutor(bro)
-    # run both coroutines
-    await asyncio.gather(fetcher.connect(), exe.worker())
+    exe.start(num_workers=5)
+    try:
+        await fetcher.connect()
+    finally:
+        exe.stop()
 
 if __name__ == "__main__":
     try:
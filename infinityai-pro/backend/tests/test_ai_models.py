@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import ai_models
+from services.ai_models import _features_kernel, _wilder_rsi, compute_features
+
+PERIOD = 14
+
+
+def reference_rsi(close, period=PERIOD):
+    """Textbook Wilder RSI, one bar at a time; 0 for warm-up bars and flat windows"""
+    rsi = np.zeros(len(close))
+    if len(close) <= period:
+        return rsi
+    changes = [close[i] - close[i - 1] for i in range(1, len(close))]
+    avg_gain = sum(max(c, 0.0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0.0) for c in changes[:period]) / period
+    for i in range(period, len(close)):
+        if i > period:
+            c = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(c, 0.0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-c, 0.0)) / period
+        if avg_loss == 0:
+            rsi[i] = 100.0 if avg_gain > 0 else 0.0
+        else:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return rsi
+
+
+@pytest.fixture
+def random_walk():
+    rng = np.random.default_rng(7)
+    return 100.0 + np.cumsum(rng.normal(0.0, 1.0, 300))
+
+
+def kernel_rsi(close):
+    return _features_kernel(close)[5]
+
+
+RSI_IMPLEMENTATIONS = [
+    pytest.param(_wilder_rsi, id="lfilter"),
+    pytest.param(kernel_rsi, id="kernel"),
+]
+if ai_models.NUMBA_AVAILABLE:
+    RSI_IMPLEMENTATIONS.append(pytest.param(lambda close: ai_models._features_nb(close)[5], id="numba"))
+
+
+@pytest.mark.parametrize("rsi", RSI_IMPLEMENTATIONS)
+def test_rsi_matches_reference(rsi, random_walk):
+    np.testing.assert_allclose(rsi(random_walk), reference_rsi(random_walk), atol=1e-9)
+
+
+@pytest.mark.parametrize("rsi", RSI_IMPLEMENTATIONS)
+def test_rsi_flat_series(rsi):
+    # No gains and no losses: avg_loss is 0 and RSI stays at the zero fill
+    close = np.full(50, 250.0)
+    np.testing.assert_array_equal(rsi(close), np.zeros(50))
+
+
+@pytest.mark.parametrize("rsi", RSI_IMPLEMENTATIONS)
+def test_rsi_rising_series(rsi):
+    # Only gains: avg_loss is 0, so RSI saturates at 100 after warm-up
+    close = np.arange(50, dtype=np.float64)
+    out = rsi(close)
+    np.testing.assert_array_equal(out[:PERIOD], 0.0)
+    np.testing.assert_allclose(out[PERIOD:], 100.0, atol=1e-9)
+
+
+@pytest.mark.parametrize("rsi", RSI_IMPLEMENTATIONS)
+def test_rsi_short_series(rsi):
+    close = np.linspace(1.0, 2.0, PERIOD)
+    np.testing.assert_array_equal(rsi(close), np.zeros(PERIOD))
+
+
+@pytest.mark.parametrize("numba", [False, True] if ai_models.NUMBA_AVAILABLE else [False])
+def test_compute_features_rsi(monkeypatch, random_walk, numba):
+    monkeypatch.setattr(ai_models, "NUMBA_AVAILABLE", numba)
+    df = compute_features(pd.DataFrame({"close": random_walk}))
+    np.testing.assert_allclose(df["RSI"].to_numpy(), reference_rsi(random_walk), atol=1e-9)
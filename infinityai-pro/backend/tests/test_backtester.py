@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from services import backtester
+from services.backtester import EVENT_BUY, EVENT_SL, EVENT_TP, Backtester
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data", "backtest_5m")
+SYMBOL = "NIFTY"
+# Small enough that the 30% position cap rejects some entries
+CAPITAL = 600.0
+
+
+def make_strategy(df):
+    closes = df["close"].to_numpy()
+
+    def strategy(df, idx):
+        if idx % 3:
+            return None
+        close = closes[idx]
+        return {"action": "BUY_OPT", "contracts": 1 + idx % 2, "premium": 40.0 + idx % 7,
+                "sl": close * 0.998, "tp": close * 1.002}
+
+    return strategy
+
+
+def reference_run(bt, strategy_fn):
+    """The original list-of-dicts bar loop, recording the same events as _run_core"""
+    balance = bt.capital
+    open_trades = []
+    equity, events = [], []
+    for i, row in bt.df.iterrows():
+        decision = strategy_fn(bt.df, i)
+        if decision and decision.get("action") == "BUY_OPT":
+            cost = decision["premium"] * decision["contracts"] + bt.commission + bt.slippage * decision["contracts"]
+            if cost <= balance * 0.3:
+                balance -= cost
+                open_trades.append({"entry_index": i, "contracts": decision["contracts"],
+                                    "entry_premium": decision["premium"], "sl": decision["sl"], "tp": decision["tp"]})
+                events.append((EVENT_BUY, i, i, cost, balance))
+        still_open = []
+        for t in open_trades:
+            if row["low"] <= t["sl"]:
+                pnl = - (t["entry_premium"] - t["sl"]) * t["contracts"]
+                events.append((EVENT_SL, i, t["entry_index"], pnl, balance))
+            elif row["high"] >= t["tp"]:
+                pnl = (t["tp"] - t["entry_premium"]) * t["contracts"]
+                balance += t["entry_premium"] * t["contracts"] + pnl
+                events.append((EVENT_TP, i, t["entry_index"], pnl, balance))
+            else:
+                still_open.append(t)
+        open_trades = still_open
+        equity.append(balance + sum((row["close"] - t["entry_premium"]) * t["contracts"] for t in open_trades))
+    return balance, np.array(equity), np.array(events)
+
+
+CORES = [pytest.param(getattr(backtester._run_core, "py_func", backtester._run_core), id="python")]
+if backtester.NUMBA_AVAILABLE:
+    CORES.append(pytest.param(backtester._run_core, id="numba"))
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # Backtester writes a Parquet cache beside the CSV; keep it out of the repo
+    shutil.copy(os.path.join(DATA_DIR, f"{SYMBOL}.csv"), tmp_path)
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("core", CORES)
+def test_run_matches_reference_loop(monkeypatch, data_path, core):
+    recorded = {}
+
+    def recording_core(*args):
+        recorded["result"] = core(*args)
+        return recorded["result"]
+
+    monkeypatch.setattr(backtester, "_run_core", recording_core)
+
+    bt = Backtester(SYMBOL, data_path, initial_capital=CAPITAL)
+    ref_balance, ref_equity, ref_events = reference_run(
+        Backtester(SYMBOL, data_path, initial_capital=CAPITAL), make_strategy(bt.df)
+    )
+    report = bt.run(make_strategy(bt.df), verbose=False)
+    balance, equity, events = recorded["result"]
+
+    # the fixture must exercise buys, rejected buys, SL and TP exits
+    codes = ref_events[:, 0].tolist()
+    assert {EVENT_BUY, EVENT_SL, EVENT_TP} <= set(codes)
+    assert codes.count(EVENT_BUY) < len(bt.df) // 3 + 1
+
+    np.testing.assert_array_equal(events[:, :3], ref_events[:, :3])
+    np.testing.assert_allclose(events[:, 3:], ref_events[:, 3:], rtol=1e-12)
+    np.testing.assert_allclose(equity, ref_equity, rtol=1e-12)
+    assert balance == pytest.approx(ref_balance, rel=1e-12)
+    assert report == {"final_capital": pytest.approx(ref_balance, rel=1e-12), "equity_curve_len": len(bt.df)}
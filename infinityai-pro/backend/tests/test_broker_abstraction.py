@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from services.broker_abstraction import CANDLE_COLUMNS, as_records, candles_to_frame
+
+
+def test_candles_to_frame_columns_and_dtypes():
+    candles = [
+        [1_700_000_000_000, 100.0, 101.5, 99.5, 101.0, 1200],
+        [1_700_000_060_000, 101.0, 102.0, 100.5, 101.5, 800],
+    ]
+    df = candles_to_frame(candles)
+
+    assert list(df.columns) == CANDLE_COLUMNS == ["open", "high", "low", "close", "volume"]
+    assert (df.dtypes == np.float64).all()
+    assert df.index.name == "timestamp"
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert str(df.index.tz) == "UTC"
+    assert list(df.index) == [
+        pd.Timestamp("2023-11-14 22:13:20", tz="UTC"),
+        pd.Timestamp("2023-11-14 22:14:20", tz="UTC"),
+    ]
+    assert df["close"].tolist() == [101.0, 101.5]
+    assert df["volume"].tolist() == [1200.0, 800.0]
+
+
+def test_candles_to_frame_empty():
+    df = candles_to_frame([])
+
+    assert df.empty
+    assert list(df.columns) == CANDLE_COLUMNS
+    assert (df.dtypes == np.float64).all()
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df.index.name == "timestamp"
+
+
+def test_candles_to_frame_ignores_extra_columns():
+    # e.g. open interest after volume
+    df = candles_to_frame([[1_700_000_000_000, 1, 2, 0.5, 1.5, 10, 99999]])
+
+    assert list(df.columns) == CANDLE_COLUMNS
+    assert df.iloc[0].tolist() == [1.0, 2.0, 0.5, 1.5, 10.0]
+
+
+def test_as_records_round_trip():
+    records = as_records(candles_to_frame([[1_700_000_000_000, 1, 2, 0.5, 1.5, 10]]))
+
+    assert records == [{
+        "timestamp": pd.Timestamp("2023-11-14 22:13:20", tz="UTC"),
+        "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0,
+    }]
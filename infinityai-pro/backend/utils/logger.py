@@ -1,15 +1,34 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+
+_log_queue: queue.SimpleQueue = None
+_listener: logging.handlers.QueueListener = None
+
+def _queue_handler() -> logging.Handler:
+    """
+    Handler that only enqueues records; a background listener thread formats
+    them and writes to stderr, so logging never blocks the event loop on I/O.
+    """
+    global _log_queue, _listener
+    if _listener is None:
+        _log_queue = queue.SimpleQueue()
+        ch = logging.StreamHandler()
+        fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+        ch.setFormatter(fmt)
+        _listener = logging.handlers.QueueListener(_log_queue, ch)
+        _listener.start()
+        atexit.register(_listener.stop)
+    return logging.handlers.QueueHandler(_log_queue)
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
     logger.setLevel(logging.INFO)
-    ch = logging.StreamHandler()
-    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
-    ch.setFormatter(fmt)
-    logger.addHandler(ch)
+    logger.addHandler(_queue_handler())
     return logger
 
 def ensure_dir(path: str):
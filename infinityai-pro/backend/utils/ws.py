@@ -0,0 +1,18 @@
+import socket
+
+# Tick feeds: ping every 15s, and a larger kernel receive buffer so bursts are not throttled
+WS_HEARTBEAT = 15.0
+WS_RCVBUF_BYTES = 4 * 1024 * 1024
+# Largest single frame accepted; anything bigger closes the connection instead of growing memory
+WS_MAX_MSG_BYTES = 4 * 1024 * 1024
+
+def tune_ws_socket(ws):
+    """Disable Nagle and enlarge the receive buffer on a connected websocket"""
+    sock = ws.get_extra_info('socket')
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, WS_RCVBUF_BYTES)
+    except OSError:
+        pass